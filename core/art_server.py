@@ -0,0 +1,244 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional, Dict, Tuple
+
+from core.library import ArtLibrary
+from core.steamdb import SteamDBFetcher
+
+logger = logging.getLogger(__name__)
+
+
+class ArtServer:
+    """
+    Local HTTP proxy/cache for Steam artwork.
+
+    Serves GET/HEAD /art/{app_id}/{key} from the install_path layout. On a miss the
+    asset is fetched from the CDN once (concurrent requests for the same asset share
+    the same fetch), saved to disk and then served like a hit. Assets the CDN could
+    not provide are answered with 404 for MISS_TTL seconds without fetching again.
+    """
+
+    CONTENT_TYPES = {
+        ".jpg": "image/jpeg",
+        ".png": "image/png",
+    }
+
+    # Upper bound on blocking CDN fetches running at the same time
+    FETCH_WORKERS = 8
+    # Idle keep-alive connections are closed after this many seconds
+    KEEPALIVE_TIMEOUT = 15
+    # Seconds a failed fetch is remembered (most are art the game simply doesn't have)
+    MISS_TTL = 60
+    # Expired misses are pruned once this many are remembered
+    MISS_PRUNE_SIZE = 4096
+
+    def __init__(self, install_root, host: str = "127.0.0.1", port: int = 8765):
+        self.library = ArtLibrary(install_root)
+        self.host = host
+        self.port = port
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        # Loop time until which a failed asset is answered with 404 without a fetch
+        self._misses: Dict[Tuple[str, str], float] = {}
+        # Install root mtime at the last folder scan; changes when another process adds a game
+        self._root_mtime: Optional[int] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.FETCH_WORKERS, thread_name_prefix="art-fetch")
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        logger.info(f"Art server listening on http://{self.host}:{self.port}/art/{{appid}}/{{key}}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self):
+        """
+        Blocking entry point; runs the server until interrupted.
+        """
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            logger.info("Art server stopped.")
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.KEEPALIVE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+
+                headers = await self._read_headers(reader)
+                keep_alive = await self._handle_request(request_line, headers, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        except Exception as e:
+            logger.error(f"Art server error: {e}")
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    async def _handle_request(self, request_line: bytes, headers: Dict[str, str],
+                              writer: asyncio.StreamWriter) -> bool:
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            await self._send_status(writer, 400, "Bad Request", keep_alive=False)
+            return False
+
+        method, target, version = parts
+        keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+        if method not in ("GET", "HEAD"):
+            await self._send_status(writer, 405, "Method Not Allowed", keep_alive)
+            return keep_alive
+
+        segments = target.split("?", 1)[0].strip("/").split("/")
+        if len(segments) != 3 or segments[0] != "art":
+            await self._send_status(writer, 404, "Not Found", keep_alive)
+            return keep_alive
+
+        _, app_id, key = segments
+        if not app_id.isdigit() or key not in SteamDBFetcher.URL_TEMPLATES:
+            await self._send_status(writer, 404, "Not Found", keep_alive)
+            return keep_alive
+
+        path = await self._get_asset(app_id, key)
+        if path is None:
+            await self._send_status(writer, 404, "Not Found", keep_alive)
+            return keep_alive
+
+        await self._send_file(writer, path, headers, keep_alive, head_only=(method == "HEAD"))
+        return keep_alive
+
+    async def _get_asset(self, app_id: str, key: str) -> Optional[Path]:
+        # Folder scans and stats touch the disk, so keep them off the event loop
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(None, self._find_asset, app_id, key)
+        if path is not None:
+            return path
+
+        asset = (app_id, key)
+        if self._misses.get(asset, 0) > loop.time():
+            return None
+
+        # Coalesce concurrent misses for the same asset into a single fetch
+        pending = self._inflight.get(asset)
+        if pending is None:
+            pending = loop.run_in_executor(self._executor, self._fetch_and_save, app_id, key)
+            self._inflight[asset] = pending
+            pending.add_done_callback(lambda future: self._fetch_done(asset, future))
+        return await asyncio.shield(pending)
+
+    def _fetch_done(self, asset: Tuple[str, str], future: asyncio.Future):
+        self._inflight.pop(asset, None)
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            return
+        now = asyncio.get_running_loop().time()
+        if len(self._misses) >= self.MISS_PRUNE_SIZE:
+            self._misses = {a: until for a, until in self._misses.items() if until > now}
+        self._misses[asset] = now + self.MISS_TTL
+
+    def _find_asset(self, app_id: str, key: str) -> Optional[Path]:
+        """
+        Runs on the executor: returns the asset's file if it is on disk.
+        The library caches its folder scan, so the scan is redone when the install root
+        has changed since (e.g. the GUI, CLI or watch mode downloaded a new game).
+        """
+        path = self.library.asset_path(app_id, key)
+        if path is None:
+            try:
+                root_mtime = self.library.root.stat().st_mtime_ns
+            except OSError:
+                root_mtime = None
+            if root_mtime != self._root_mtime:
+                self._root_mtime = root_mtime
+                self.library.refresh()
+                path = self.library.asset_path(app_id, key)
+        if path is not None and path.is_file():
+            return path
+        return None
+
+    def _fetch_and_save(self, app_id: str, key: str) -> Optional[Path]:
+        """
+        Runs on the executor: downloads one asset into the library.
+        """
+        img_data = SteamDBFetcher.fetch_image(app_id, key)
+        if not img_data:
+            return None
+
+        try:
+            base_dir = self.library.find_game_dir(app_id)
+            if base_dir is None:
+                base_dir = self.library.game_dir(app_id, SteamDBFetcher.get_game_name(app_id))
+        except OSError as e:
+            logger.error(f"Error creating folder for {app_id}: {e}")
+            return None
+
+        target = base_dir / ArtLibrary.LOCAL_FILENAMES[key]
+        if SteamDBFetcher.save_image(img_data, str(target)):
+            return target
+        return None
+
+    async def _send_file(self, writer: asyncio.StreamWriter, path: Path, headers: Dict[str, str],
+                         keep_alive: bool, head_only: bool):
+        try:
+            f = open(path, "rb")
+        except OSError:
+            await self._send_status(writer, 404, "Not Found", keep_alive)
+            return
+
+        with f:
+            st = os.fstat(f.fileno())
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            response_headers = {
+                "ETag": etag,
+                "Last-Modified": formatdate(st.st_mtime, usegmt=True),
+                "Cache-Control": "public, max-age=86400",
+            }
+
+            if etag in headers.get("if-none-match", ""):
+                await self._send_status(writer, 304, "Not Modified", keep_alive, response_headers)
+                return
+
+            response_headers["Content-Type"] = self.CONTENT_TYPES.get(path.suffix, "application/octet-stream")
+            response_headers["Content-Length"] = str(st.st_size)
+            self._write_head(writer, 200, "OK", keep_alive, response_headers)
+            await writer.drain()
+
+            if not head_only:
+                # Uses os.sendfile where the transport supports it, plain writes otherwise
+                await asyncio.get_running_loop().sendfile(writer.transport, f, 0, st.st_size)
+
+    async def _send_status(self, writer: asyncio.StreamWriter, code: int, reason: str,
+                           keep_alive: bool, extra_headers: Optional[Dict[str, str]] = None):
+        headers = dict(extra_headers or {})
+        if code != 304:
+            headers["Content-Length"] = "0"
+        self._write_head(writer, code, reason, keep_alive, headers)
+        await writer.drain()
+
+    @staticmethod
+    def _write_head(writer: asyncio.StreamWriter, code: int, reason: str, keep_alive: bool,
+                    headers: Dict[str, str]):
+        lines = [f"HTTP/1.1 {code} {reason}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
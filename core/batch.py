@@ -0,0 +1,292 @@
+import logging
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from core.integrity import HashManifest
+from core.library import ArtLibrary
+from core.names import NameCache, NameResolver, UNKNOWN_NAME
+from core.pipeline import Pipeline, Stage
+from core.steamdb import SteamDBFetcher
+
+logger = logging.getLogger(__name__)
+
+
+class GameJob:
+    """
+    State for one game as it moves through the BatchDownloader stages.
+    """
+
+    def __init__(self, app_id: str, keys: List[str]):
+        self.app_id = app_id
+        self.keys = keys
+        self.game_name = UNKNOWN_NAME
+        self.name_future: Optional[Future] = None
+        self.base_dir: Optional[Path] = None
+        self.staged = False
+        self.results: Dict[str, Optional[bytes]] = {}
+        # HTTP validators (etag/last_modified) of freshly fetched images, by key
+        self.validators: Dict[str, Dict[str, str]] = {}
+        # Keys whose file on disk was confirmed current with a 304
+        self.unchanged: List[str] = []
+        self.saved = 0
+        self.error = ""
+        # Stopped before its images were fetched; not reported as processed
+        self.cancelled = False
+
+    @property
+    def succeeded(self) -> bool:
+        return self.saved > 0 or bool(self.unchanged)
+
+
+def iter_app_ids(path) -> Iterator[str]:
+    """
+    Lazily yields AppIDs from a text file (whitespace and/or comma separated).
+    Non-numeric tokens are skipped.
+    """
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            for token in line.replace(",", " ").split():
+                if token.isdigit():
+                    yield token
+
+
+def count_app_ids(path) -> int:
+    """
+    Counts the AppIDs in a file without keeping them in memory.
+    """
+    return sum(1 for _ in iter_app_ids(path))
+
+
+class BatchDownloader:
+    """
+    Downloads artwork for a stream of AppIDs through a staged pipeline:
+    start (queue name lookup) -> fetch images -> write files -> place folder -> publish.
+
+    Name lookups run on a separate resolver pool, so images for a new game are fetched
+    straight away into an ID-keyed staging folder. The place stage renames that folder
+    to "Name (app_id)" once the name arrives.
+
+    Each stage has its own worker count and stages are connected by bounded queues,
+    so the input can be an arbitrarily long generator.
+    """
+
+    # Flush the hash manifest and name cache to disk every this many games
+    MANIFEST_SAVE_INTERVAL = 500
+    # Longest time the place stage waits for a name before using "Unknown Game"
+    NAME_TIMEOUT = 30
+
+    def __init__(self, install_root, settings: Optional[dict] = None,
+                 on_item: Optional[Callable[[GameJob], None]] = None,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 revalidate: bool = True, manifest=None):
+        """
+        `manifest` replaces the library's HashManifest, e.g. with a per-process ManifestJournal.
+        With revalidate, files that are unchanged since they were recorded are fetched
+        with a conditional request and kept on a 304. Pass False to always overwrite
+        them (e.g. when repairing files whose content is known to be bad).
+        """
+        self.library = ArtLibrary(install_root)
+        self.manifest = manifest if manifest is not None else HashManifest(install_root)
+        self.names = NameCache(install_root)
+        self.settings = settings or {}
+        self.on_item = on_item
+        self.on_progress = on_progress
+        self.revalidate = revalidate
+
+        self.total_steps = 0
+        self.current_step = 0
+        self.success_count = 0
+        self.processed_count = 0
+        self._lock = threading.Lock()
+        self._pipeline: Optional[Pipeline] = None
+        self._stop_requested = False
+        # AppIDs between the start and publish stages
+        self._active = set()
+
+    def run(self, app_ids: Iterable, total: Optional[int] = None) -> int:
+        """
+        Processes every item of `app_ids` and returns the number of games saved successfully.
+        Items are AppID strings, or (app_id, keys) tuples to fetch only some artwork types.
+        `total` is the number of games if known up front; it is only used for progress.
+        """
+        artwork_keys = list(SteamDBFetcher.URL_TEMPLATES.keys())
+        self.total_steps = (total or 0) * len(artwork_keys)
+
+        self._resolver = NameResolver(self.names, self.settings.get("resolve_workers", 4))
+        self._pipeline = Pipeline([
+            Stage("start", self._start, 1),
+            Stage("fetch", self._fetch, self.settings.get("fetch_workers", 8)),
+            Stage("write", self._write, self.settings.get("write_workers", 2)),
+            Stage("place", self._place, self.settings.get("place_workers", 1)),
+            Stage("publish", self._publish, self.settings.get("publish_workers", 1)),
+        ], queue_size=self.settings.get("queue_size", 8))
+        if self._stop_requested:
+            # stop() was called before the pipeline existed
+            self._pipeline.stop()
+
+        jobs = (self._make_job(item, artwork_keys) for item in app_ids)
+        try:
+            self._pipeline.run(jobs)
+        finally:
+            self._resolver.shutdown()
+            self.manifest.save()
+
+        if self.total_steps and self.on_progress:
+            self.on_progress(self.total_steps, self.total_steps)
+        return self.success_count
+
+    def stop(self):
+        """
+        Stops reading new AppIDs. Games already fetched are still written and placed;
+        queued games that were not fetched yet are dropped.
+        """
+        self._stop_requested = True
+        if self._pipeline:
+            self._pipeline.stop()
+
+    @staticmethod
+    def _make_job(item, artwork_keys: List[str]) -> GameJob:
+        if isinstance(item, (tuple, list)):
+            app_id, keys = item
+            return GameJob(str(app_id), [k for k in keys if k in artwork_keys])
+        return GameJob(str(item), artwork_keys)
+
+    def _advance(self, steps: int):
+        with self._lock:
+            self.current_step += steps
+            current = self.current_step
+        if self.on_progress:
+            self.on_progress(current, self.total_steps)
+
+    # --- Stages ---
+
+    def _start(self, job: GameJob) -> Optional[GameJob]:
+        with self._lock:
+            duplicate = job.app_id in self._active
+            self._active.add(job.app_id)
+        if duplicate:
+            # A second job for the same game would write the same files concurrently
+            logger.info(f"Skipping duplicate AppID {job.app_id}")
+            self._advance(len(job.keys))
+            return None
+
+        try:
+            job.base_dir = self.library.find_game_dir(job.app_id)
+            if job.base_dir is None:
+                job.base_dir = self.library.staging_dir(job.app_id)
+                job.staged = True
+        except OSError as e:
+            job.error = f"Error creating folder for {job.app_id}: {e}"
+
+        if job.base_dir is not None and not job.staged and not self._is_unknown_dir(job):
+            # Already named on disk; no lookup needed
+            job.name_future = Future()
+            job.name_future.set_result(self.names.get(job.app_id) or job.base_dir.name.rsplit(" (", 1)[0])
+        else:
+            # Kick off the name lookup without waiting for it
+            job.name_future = self._resolver.lookup(job.app_id)
+        return job
+
+    @staticmethod
+    def _is_unknown_dir(job: GameJob) -> bool:
+        return job.base_dir.name == ArtLibrary.folder_name(UNKNOWN_NAME, job.app_id)
+
+    def _fetch(self, job: GameJob) -> GameJob:
+        if job.error or self._pipeline.stopped:
+            job.cancelled = not job.error
+            self._advance(len(job.keys))
+            return job
+        for key in job.keys:
+            current = self._current_file(job, key)
+            entry = self.manifest.get(job.app_id, key) if current else None
+            data, validators, not_modified = SteamDBFetcher.fetch_image_conditional(
+                job.app_id, key,
+                etag=(entry or {}).get("etag", ""),
+                last_modified=(entry or {}).get("last_modified", ""),
+            )
+            if not_modified:
+                # The file on disk is current; nothing to write or hold in memory
+                job.unchanged.append(key)
+            elif data:
+                job.validators[key] = validators
+            job.results[key] = data
+            self._advance(1)
+        return job
+
+    def _current_file(self, job: GameJob, key: str) -> Optional[Path]:
+        """
+        The existing file for this key, if the manifest vouches it is unchanged since it was recorded.
+        """
+        if not self.revalidate or job.staged or key not in ArtLibrary.LOCAL_FILENAMES:
+            return None
+        entry = self.manifest.get(job.app_id, key)
+        if not entry or not (entry.get("etag") or entry.get("last_modified")):
+            return None
+        path = job.base_dir / ArtLibrary.LOCAL_FILENAMES[key]
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        if (st.st_size, st.st_mtime_ns) != (entry.get("size"), entry.get("mtime_ns")):
+            return None
+        return path
+
+    def _write(self, job: GameJob) -> GameJob:
+        if job.error:
+            return job
+        for key, img_data in job.results.items():
+            if img_data and key in ArtLibrary.LOCAL_FILENAMES and key not in job.unchanged:
+                target = job.base_dir / ArtLibrary.LOCAL_FILENAMES[key]
+                if SteamDBFetcher.save_image(img_data, str(target)):
+                    self.manifest.record(job.app_id, key, target, img_data, **job.validators.get(key, {}))
+                    job.saved += 1
+        return job
+
+    def _place(self, job: GameJob) -> GameJob:
+        if job.cancelled:
+            if job.staged:
+                try:
+                    # Nothing was fetched, so this just removes the empty staging folder
+                    self.library.place_staged(job.app_id, job.game_name, job.base_dir)
+                except OSError as e:
+                    logger.warning(f"Could not remove staging folder {job.base_dir}: {e}")
+            return job
+
+        try:
+            job.game_name = job.name_future.result(timeout=self.NAME_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Name lookup for {job.app_id} did not finish: {e}")
+        if job.error:
+            return job
+
+        try:
+            if job.staged:
+                placed = self.library.place_staged(job.app_id, job.game_name, job.base_dir)
+                if placed is not None:
+                    job.base_dir = placed
+            elif job.game_name != UNKNOWN_NAME and self._is_unknown_dir(job):
+                # Late rename of a folder created as "Unknown Game (id)" whose name has since resolved
+                job.base_dir = self.library.rename_game_dir(job.app_id, job.game_name) or job.base_dir
+        except OSError as e:
+            job.error = f"Error creating folder for {job.app_id}: {e}"
+        return job
+
+    def _publish(self, job: GameJob) -> None:
+        with self._lock:
+            self._active.discard(job.app_id)
+            if job.cancelled:
+                return None
+            self.processed_count += 1
+            if job.succeeded:
+                self.success_count += 1
+            save_manifest = self.processed_count % self.MANIFEST_SAVE_INTERVAL == 0
+        if save_manifest:
+            self.manifest.save()
+            self.names.save()
+        if self.on_item:
+            self.on_item(job)
+        # Drop image bytes as soon as the consumer is done with them
+        job.results = {}
+        return None
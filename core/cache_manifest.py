@@ -0,0 +1,264 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+import zipfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from core.imageinfo import check_image_file
+from core.integrity import HashManifest
+from core.library import ArtLibrary
+from core.names import NameCache, UNKNOWN_NAME
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+# Blobs in a bundle are stored uncompressed (JPEG/PNG don't shrink) under their sha256
+BLOB_PREFIX = "blobs/"
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def _sha256_path(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _write_verified(src, target: Path, sha256: str) -> bool:
+    """
+    Streams a file object to target, hashing on the way, and only moves it into
+    place if the hash matches.
+    """
+    tmp_path = target.with_name(target.name + ".part")
+    digest = hashlib.sha256()
+    try:
+        with open(tmp_path, "wb") as out:
+            while True:
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                out.write(chunk)
+        if digest.hexdigest() != sha256:
+            tmp_path.unlink()
+            return False
+        os.replace(tmp_path, target)
+        return True
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _link_verified(src: Path, target: Path, sha256: str) -> bool:
+    """
+    Hardlinks src to target if its hash matches. Falls back to a verified copy
+    when the two paths are on different volumes (or links aren't supported).
+    """
+    if _sha256_path(src) != sha256:
+        return False
+    tmp_path = target.with_name(target.name + ".part")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        os.link(src, tmp_path)
+    except OSError:
+        with open(src, "rb") as f:
+            return _write_verified(f, target, sha256)
+    os.replace(tmp_path, target)
+    return True
+
+
+def export_cache(install_root, manifest_path, bundle_path=None) -> Dict[str, int]:
+    """
+    Writes a portable manifest (gzip JSON) describing every downloaded file with its
+    sha256, size and HTTP validators, plus the resolved game names.
+    With bundle_path, the files themselves are also packed into a zip, once per hash.
+    Files that are damaged, or no longer match their recorded hash, are left out.
+    The local hash manifest is only read.
+    Returns counts of games, files, bundled blobs and skipped files.
+    """
+    library = ArtLibrary(install_root)
+    hashes = HashManifest(install_root, readonly=True)
+    names = NameCache(install_root).items()
+
+    games: Dict[str, Dict[str, Any]] = {}
+    packed = set()
+    skipped = 0
+    bundle = zipfile.ZipFile(bundle_path, "w", zipfile.ZIP_STORED) if bundle_path else None
+    try:
+        for app_id, key, path in library.iter_assets():
+            st = path.stat()
+            entry = hashes.get(app_id, key)
+            if entry is None or (entry.get("size"), entry.get("mtime_ns")) != (st.st_size, st.st_mtime_ns):
+                entry = _check_changed(path, st.st_size, entry)
+                if entry is None:
+                    skipped += 1
+                    continue
+
+            game = games.setdefault(app_id, {"folder": path.parent.name, "files": {}})
+            game["files"][key] = {
+                field: entry[field]
+                for field in ("sha256", "size", "etag", "last_modified")
+                if entry.get(field)
+            }
+
+            if bundle is not None and entry["sha256"] not in packed:
+                bundle.write(path, BLOB_PREFIX + entry["sha256"])
+                packed.add(entry["sha256"])
+    finally:
+        if bundle is not None:
+            bundle.close()
+        hashes.close()
+
+    doc = {
+        "version": FORMAT_VERSION,
+        "created": int(time.time()),
+        "names": {app_id: name for app_id, name in names.items() if name != UNKNOWN_NAME},
+        "games": games,
+    }
+    manifest_path = Path(manifest_path)
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, manifest_path)
+
+    return {
+        "games": len(games),
+        "files": sum(len(game["files"]) for game in games.values()),
+        "blobs": len(packed),
+        "skipped": skipped,
+    }
+
+
+def _check_changed(path: Path, size: int, recorded: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Entry to export for a file that was never recorded or changed since it was.
+    Returns None, with a warning, for a file that is damaged or no longer matches
+    its recorded hash.
+    """
+    with open(path, "rb") as f:
+        reason = check_image_file(f, size)
+    if reason:
+        logger.warning(f"Not exporting {path}: {reason}")
+        return None
+    sha256 = _sha256_path(path)
+    if recorded is None:
+        return {"sha256": sha256, "size": size}
+    if recorded["sha256"] != sha256:
+        logger.warning(f"Not exporting {path}: it no longer matches its recorded hash (run 'verify --repair')")
+        return None
+    # Only touched: the recorded validators still describe this content
+    return dict(recorded, size=size)
+
+
+def load_cache_manifest(manifest_path) -> Dict[str, Any]:
+    with gzip.open(manifest_path, "rt", encoding="utf-8") as f:
+        doc = json.load(f)
+    if doc.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported cache manifest version: {doc.get('version')}")
+    return doc
+
+
+def import_cache(install_root, manifest_path, bundle_path=None, source_root=None,
+                 copy: bool = False) -> Tuple[Dict[str, int], List[Tuple[str, List[str]]]]:
+    """
+    Seeds install_root from a manifest written by export_cache.
+
+    Each file is taken, in order of preference, from install_root itself (already
+    present), from source_root (another copy of the library, e.g. a network share;
+    hardlinked unless copy=True or on another volume) or from the blob bundle.
+    Every file is checked against its sha256 before it is placed.
+
+    Names and HTTP validators are merged into the local caches, so later downloads of
+    seeded files are conditional requests answered with 304 Not Modified.
+
+    Returns (stats, missing): missing holds (app_id, keys) for files no source could
+    provide, ready to pass to BatchDownloader.run().
+    """
+    doc = load_cache_manifest(manifest_path)
+    library = ArtLibrary(install_root)
+    hashes = HashManifest(install_root)
+    names = NameCache(install_root)
+    source_root = Path(source_root) if source_root else None
+
+    for app_id, name in doc.get("names", {}).items():
+        if names.get(app_id) in (None, UNKNOWN_NAME):
+            names.set(app_id, name)
+
+    stats = {"present": 0, "linked": 0, "copied": 0, "unpacked": 0, "missing": 0}
+    missing: List[Tuple[str, List[str]]] = []
+    bundle = zipfile.ZipFile(bundle_path) if bundle_path else None
+    blobs = set(bundle.namelist()) if bundle is not None else set()
+    try:
+        for app_id, game in doc.get("games", {}).items():
+            missing_keys = []
+            for key, wanted in game.get("files", {}).items():
+                filename = ArtLibrary.LOCAL_FILENAMES.get(key)
+                if not filename:
+                    continue
+                validators = {field: wanted[field] for field in ("etag", "last_modified") if wanted.get(field)}
+
+                base_dir = library.find_game_dir(app_id)
+                target = base_dir / filename if base_dir else None
+                if target is not None and target.is_file() and _is_current(hashes, app_id, key, target, wanted):
+                    hashes.record_digest(app_id, key, target, wanted["sha256"], **validators)
+                    stats["present"] += 1
+                    continue
+
+                placed = None
+                source = source_root / game["folder"] / filename if source_root else None
+                if source is not None and source.is_file() and source.stat().st_size == wanted["size"]:
+                    target = target or _target_path(library, names, app_id, game, filename)
+                    if copy:
+                        with open(source, "rb") as f:
+                            placed = "copied" if _write_verified(f, target, wanted["sha256"]) else None
+                    else:
+                        placed = "linked" if _link_verified(source, target, wanted["sha256"]) else None
+
+                blob = BLOB_PREFIX + wanted["sha256"]
+                if placed is None and blob in blobs:
+                    target = target or _target_path(library, names, app_id, game, filename)
+                    with bundle.open(blob) as f:
+                        placed = "unpacked" if _write_verified(f, target, wanted["sha256"]) else None
+
+                if placed is None:
+                    if target is not None and target.is_file():
+                        # An older version that no longer matches; refetch unconditionally
+                        hashes.remove(app_id, key)
+                    missing_keys.append(key)
+                    stats["missing"] += 1
+                    continue
+
+                hashes.record_digest(app_id, key, target, wanted["sha256"], **validators)
+                stats[placed] += 1
+
+            if missing_keys:
+                missing.append((app_id, missing_keys))
+    finally:
+        if bundle is not None:
+            bundle.close()
+        hashes.close()
+        names.save()
+
+    return stats, missing
+
+
+def _is_current(hashes: HashManifest, app_id: str, key: str, path: Path, wanted: Dict[str, Any]) -> bool:
+    st = path.stat()
+    if st.st_size != wanted["size"]:
+        return False
+    entry = hashes.get(app_id, key)
+    if entry and (entry.get("size"), entry.get("mtime_ns")) == (st.st_size, st.st_mtime_ns):
+        return entry.get("sha256") == wanted["sha256"]
+    return _sha256_path(path) == wanted["sha256"]
+
+
+def _target_path(library: ArtLibrary, names: NameCache, app_id: str, game: Dict[str, Any], filename: str) -> Path:
+    """
+    Where a file for a game that has no folder yet goes; the folder is created on demand.
+    """
+    name = names.get(app_id) or game["folder"].rsplit(" (", 1)[0]
+    return library.game_dir(app_id, name) / filename
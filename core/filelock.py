@@ -0,0 +1,42 @@
+import logging
+import os
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+class FileLock:
+    """
+    Cross-process lock held by creating a lock file with O_EXCL, for the shared
+    bookkeeping files in the install folder. Use it as a context manager.
+    A lock still present after `wait` seconds is assumed to belong to a writer
+    that died without cleaning up, and is removed.
+    """
+
+    def __init__(self, path, wait: float = 30):
+        self.path = Path(path)
+        self.wait = wait
+        self._fd = None
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.wait
+        while True:
+            try:
+                self._fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                return self
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    logger.warning(f"Removing stale lock {self.path}")
+                    self.path.unlink(missing_ok=True)
+                    deadline = time.monotonic() + self.wait
+                else:
+                    time.sleep(0.05)
+
+    def __exit__(self, exc_type, exc, tb):
+        os.close(self._fd)
+        self._fd = None
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
@@ -0,0 +1,156 @@
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from core.imageinfo import read_image_info
+from core.library import ArtLibrary
+
+logger = logging.getLogger(__name__)
+
+
+class ImageIndex:
+    """
+    SQLite index of width/height/format/size for every downloaded asset, stored in
+    <install_root>/.index.sqlite. Only image headers are read (JPEG SOF / PNG IHDR),
+    and update() only re-reads files whose mtime or size changed.
+    """
+    FILENAME = ".index.sqlite"
+
+    # Short names accepted wherever an artwork key is expected
+    KEY_ALIASES = {
+        "hero": "library_hero_2x",
+        "library": "library_600x900_2x",
+        "portrait": "library_600x900_2x",
+        "capsule": "capsule_231x87",
+    }
+
+    def __init__(self, install_root):
+        self.root = Path(install_root)
+        self.path = self.root / self.FILENAME
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS games (
+                app_id TEXT PRIMARY KEY,
+                folder TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS assets (
+                app_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                format TEXT,
+                width INTEGER,
+                height INTEGER,
+                PRIMARY KEY (app_id, key)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS assets_key_width ON assets (key, width);
+        """)
+
+    def close(self):
+        self._conn.close()
+
+    @classmethod
+    def resolve_key(cls, key: str) -> str:
+        key = cls.KEY_ALIASES.get(key, key)
+        if key not in ArtLibrary.LOCAL_FILENAMES:
+            raise ValueError(f"Unknown artwork type: {key}")
+        return key
+
+    def update(self) -> Dict[str, int]:
+        """
+        Brings the index in line with the files on disk.
+        Returns counts of files read, unchanged and removed.
+        """
+        library = ArtLibrary(self.root)
+        library.refresh()
+        dirs = library.game_dirs()
+
+        known = {
+            (row[0], row[1]): (row[2], row[3])
+            for row in self._conn.execute("SELECT app_id, key, mtime_ns, size FROM assets")
+        }
+        stats = {"read": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+
+        with self._conn:
+            self._conn.execute("DELETE FROM games")
+            self._conn.executemany("INSERT INTO games (app_id, folder) VALUES (?, ?)",
+                                   [(app_id, path.name) for app_id, path in dirs.items()])
+
+            for app_id, folder in dirs.items():
+                try:
+                    entries = {entry.name: entry for entry in os.scandir(folder)}
+                except OSError as e:
+                    logger.warning(f"Cannot read {folder}: {e}")
+                    continue
+
+                for key, filename in ArtLibrary.LOCAL_FILENAMES.items():
+                    entry = entries.get(filename)
+                    if entry is None:
+                        continue
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        # Removed between the listing and the stat
+                        continue
+                    seen.add((app_id, key))
+                    if known.get((app_id, key)) == (st.st_mtime_ns, st.st_size):
+                        stats["unchanged"] += 1
+                        continue
+
+                    info = read_image_info(entry.path) or {}
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (app_id, key, st.st_mtime_ns, st.st_size,
+                         info.get("format"), info.get("width"), info.get("height")),
+                    )
+                    stats["read"] += 1
+
+            removed = [asset for asset in known if asset not in seen]
+            self._conn.executemany("DELETE FROM assets WHERE app_id = ? AND key = ?", removed)
+            stats["removed"] = len(removed)
+
+        return stats
+
+    # --- Queries ---
+
+    def missing(self, key: str) -> List[Dict[str, Any]]:
+        """
+        Games that have no file for the given artwork type (e.g. "games with no hero").
+        """
+        key = self.resolve_key(key)
+        rows = self._conn.execute("""
+            SELECT g.app_id, g.folder FROM games g
+            WHERE NOT EXISTS (SELECT 1 FROM assets a WHERE a.app_id = g.app_id AND a.key = ?)
+            ORDER BY g.folder
+        """, (key,))
+        return [{"app_id": app_id, "folder": folder} for app_id, folder in rows]
+
+    def smaller_than(self, key: str, min_width: int, min_height: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Assets of the given type narrower than min_width (or shorter than min_height),
+        e.g. "logos under 400px". Unreadable files (no width) are included.
+        """
+        key = self.resolve_key(key)
+        rows = self._conn.execute("""
+            SELECT a.app_id, g.folder, a.format, a.width, a.height, a.size
+            FROM assets a JOIN games g ON g.app_id = a.app_id
+            WHERE a.key = ? AND (a.width IS NULL OR a.width < ? OR a.height < ?)
+            ORDER BY a.width
+        """, (key, min_width, min_height if min_height is not None else 0))
+        return [
+            {"app_id": app_id, "folder": folder, "format": fmt, "width": width, "height": height, "size": size}
+            for app_id, folder, fmt, width, height, size in rows
+        ]
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Number of indexed games and the number of files per artwork type.
+        """
+        summary = {"games": self._conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]}
+        for key, count in self._conn.execute("SELECT key, COUNT(*) FROM assets GROUP BY key"):
+            summary[key] = count
+        return summary
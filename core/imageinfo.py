@@ -0,0 +1,135 @@
+import struct
+import zlib
+from typing import Optional, Dict, Any, Tuple, BinaryIO
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+JPEG_SOI = b"\xff\xd8"
+JPEG_EOI = b"\xff\xd9"
+PNG_IEND = b"\x00\x00\x00\x00IEND\xaeB`\x82"
+
+# SOF markers carrying the frame size (excludes DHT 0xC4, JPG 0xC8 and DAC 0xCC)
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Markers without a length field
+JPEG_STANDALONE_MARKERS = {0x01} | set(range(0xD0, 0xD8))
+
+# How far back from the end of a file to look for the JPEG EOI marker (encoders may pad)
+JPEG_TAIL_WINDOW = 64
+# Stop scanning JPEG segments for a SOF marker after this many bytes
+JPEG_MAX_HEADER_SCAN = 1 << 20
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """
+    Returns 'jpeg' or 'png' based on magic bytes, or None.
+    """
+    if head.startswith(PNG_SIGNATURE):
+        return "png"
+    if head.startswith(JPEG_SOI + b"\xff"):
+        return "jpeg"
+    return None
+
+
+def _read_png_header(f: BinaryIO) -> Tuple[Optional[Dict[str, Any]], str]:
+    head = f.read(33)  # signature + IHDR chunk (length, type, 13 bytes data, CRC)
+    if len(head) < 33:
+        return None, "truncated PNG header"
+    length, chunk_type = struct.unpack(">I4s", head[8:16])
+    if chunk_type != b"IHDR" or length != 13:
+        return None, "PNG missing IHDR"
+    data = head[16:29]
+    (crc,) = struct.unpack(">I", head[29:33])
+    if zlib.crc32(chunk_type + data) != crc:
+        return None, "PNG IHDR CRC mismatch"
+    width, height = struct.unpack(">II", data[:8])
+    return {"format": "png", "width": width, "height": height}, ""
+
+
+def _read_jpeg_header(f: BinaryIO) -> Tuple[Optional[Dict[str, Any]], str]:
+    f.seek(2)
+    while f.tell() < JPEG_MAX_HEADER_SCAN:
+        byte = f.read(1)
+        if not byte:
+            return None, "truncated JPEG header"
+        if byte != b"\xff":
+            return None, "corrupt JPEG marker"
+        marker = f.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None, "truncated JPEG header"
+        code = marker[0]
+        if code in JPEG_STANDALONE_MARKERS:
+            continue
+        if code in (0xD9, 0xDA):  # EOI / SOS before any frame header
+            return None, "JPEG missing SOF"
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None, "truncated JPEG header"
+        (length,) = struct.unpack(">H", length_bytes)
+        if length < 2:
+            return None, "corrupt JPEG segment"
+        if code in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None, "truncated JPEG header"
+            height, width = struct.unpack(">HH", frame[1:5])
+            return {"format": "jpeg", "width": width, "height": height}, ""
+        f.seek(length - 2, 1)
+    return None, "JPEG missing SOF"
+
+
+def read_image_header(f: BinaryIO) -> Tuple[Optional[Dict[str, Any]], str]:
+    """
+    Parses just enough of a JPEG (up to the SOF segment) or PNG (IHDR chunk) to return
+    {'format', 'width', 'height'}. Returns (None, reason) if the header is invalid.
+    """
+    f.seek(0)
+    fmt = sniff_format(f.read(8))
+    if fmt == "png":
+        f.seek(0)
+        return _read_png_header(f)
+    if fmt == "jpeg":
+        return _read_jpeg_header(f)
+    return None, "not a JPEG/PNG file"
+
+
+def read_image_info(path) -> Optional[Dict[str, Any]]:
+    """
+    Returns {'format', 'width', 'height'} for an image file, reading only its header.
+    """
+    try:
+        with open(path, "rb") as f:
+            info, _ = read_image_header(f)
+            return info
+    except OSError:
+        return None
+
+
+def check_image_file(f: BinaryIO, size: int) -> str:
+    """
+    Checks magic bytes, header and trailer of an open image file.
+    Returns an empty string if the file looks complete, otherwise the reason it does not.
+    """
+    info, reason = read_image_header(f)
+    if info is None:
+        return reason
+    if info["width"] == 0 or info["height"] == 0:
+        return "zero image dimensions"
+
+    if info["format"] == "png":
+        f.seek(max(0, size - len(PNG_IEND)))
+        if f.read() != PNG_IEND:
+            return "truncated PNG (no IEND)"
+    else:
+        f.seek(max(0, size - JPEG_TAIL_WINDOW))
+        if JPEG_EOI not in f.read():
+            return "truncated JPEG (no EOI)"
+    return ""
+
+
+def check_image_bytes(data: bytes) -> str:
+    """
+    Same as check_image_file for an in-memory image.
+    """
+    import io
+    return check_image_file(io.BytesIO(data), len(data))
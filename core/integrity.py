@@ -0,0 +1,379 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from core.imageinfo import check_image_file
+from core.library import ArtLibrary
+
+logger = logging.getLogger(__name__)
+
+
+class HashManifest:
+    """
+    Records sha256/size/mtime (and the HTTP validators) of every saved artwork file
+    in the SQLite database <install_root>/.manifest.sqlite, keyed by (app_id, key)
+    so entries survive game folder renames.
+
+    Lookups are indexed, so nothing is loaded up front. Changes are buffered and
+    written by save() in one short transaction; SQLite's locking lets several
+    processes (GUI, watch mode, CLI) share one manifest.
+    """
+    FILENAME = ".manifest.sqlite"
+    # Earlier releases kept the manifest as one JSON document; it is imported once
+    LEGACY_FILENAME = ".manifest.json"
+
+    # Optional per-entry fields stored besides sha256/size/mtime_ns
+    EXTRA_FIELDS = ("etag", "last_modified")
+
+    # Seconds to wait for another process to finish writing the manifest
+    LOCK_WAIT = 30
+    # Journal records buffered per transaction by merge_journal()
+    MERGE_BATCH = 10000
+
+    def __init__(self, install_root, readonly: bool = False):
+        """
+        With readonly=True nothing on disk is created, migrated or written:
+        changes stay in memory and save() leaves the database untouched.
+        """
+        self.root = Path(install_root)
+        self.path = self.root / self.FILENAME
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        # Entries changed since the last save (None = removed)
+        self._changes: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+
+        # Used from the pipeline's worker threads; access is serialized by self._lock
+        if readonly and self.path.exists():
+            self._conn = sqlite3.connect(f"{self.path.as_uri()}?mode=ro", uri=True,
+                                         timeout=self.LOCK_WAIT, check_same_thread=False)
+            return
+        if readonly:
+            # No database yet: read the legacy file (if any) into a throwaway one
+            self._conn = sqlite3.connect(":memory:", check_same_thread=False)
+        else:
+            self.root.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=self.LOCK_WAIT, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                app_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                PRIMARY KEY (app_id, key)
+            ) WITHOUT ROWID;
+        """)
+        self._migrate_legacy()
+
+    def close(self):
+        self.save()
+        with self._lock:
+            self._conn.close()
+
+    def _migrate_legacy(self):
+        legacy = self.root / self.LEGACY_FILENAME
+        if not legacy.exists():
+            return
+        try:
+            with open(legacy, "r") as f:
+                files = json.load(f).get("files", {})
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Error loading legacy manifest: {e}")
+            return
+
+        rows = []
+        for entry_key, entry in files.items():
+            app_id, _, key = entry_key.partition("/")
+            rows.append(self._row(app_id, key, entry))
+        try:
+            with self._conn:
+                # Entries already in the database are newer than the legacy file
+                self._conn.executemany("INSERT OR IGNORE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            if self.readonly:
+                return
+            os.replace(legacy, legacy.with_suffix(".json.bak"))
+            logger.info(f"Moved {len(rows)} manifest entries into {self.FILENAME}.")
+        except FileNotFoundError:
+            # Another process migrated it at the same time
+            pass
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"Error migrating legacy manifest: {e}")
+
+    @classmethod
+    def _row(cls, app_id: str, key: str, entry: Dict[str, Any]) -> tuple:
+        return (app_id, key, entry["sha256"], entry["size"], entry["mtime_ns"],
+                *(entry.get(field) or None for field in cls.EXTRA_FIELDS))
+
+    @classmethod
+    def _entry(cls, row) -> Dict[str, Any]:
+        sha256, size, mtime_ns, *extra = row
+        entry = {"sha256": sha256, "size": size, "mtime_ns": mtime_ns}
+        entry.update((field, value) for field, value in zip(cls.EXTRA_FIELDS, extra) if value)
+        return entry
+
+    def save(self) -> bool:
+        """
+        Writes the buffered changes in one transaction.
+        Returns False if the manifest could not be written.
+        """
+        with self._lock:
+            if not self._changes or self.readonly:
+                return True
+            changes = self._changes
+            self._changes = {}
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        "DELETE FROM files WHERE app_id = ? AND key = ?",
+                        [asset for asset, entry in changes.items() if entry is None],
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [self._row(*asset, entry) for asset, entry in changes.items() if entry is not None],
+                    )
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Error saving manifest: {e}")
+                # Retry these changes on the next save
+                for asset, entry in changes.items():
+                    self._changes.setdefault(asset, entry)
+                return False
+
+    @staticmethod
+    def entry_key(app_id: str, key: str) -> str:
+        return f"{app_id}/{key}"
+
+    def get(self, app_id: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if (app_id, key) in self._changes:
+                return self._changes[(app_id, key)]
+            row = self._conn.execute(
+                "SELECT sha256, size, mtime_ns, etag, last_modified FROM files WHERE app_id = ? AND key = ?",
+                (app_id, key),
+            ).fetchone()
+        return self._entry(row) if row else None
+
+    def entries_for(self, app_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns {"<app_id>/<key>": entry} for the given games (saved entries only).
+        """
+        app_ids = list(app_ids)
+        entries = {}
+        with self._lock:
+            for i in range(0, len(app_ids), 500):
+                batch = app_ids[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT app_id, key, sha256, size, mtime_ns, etag, last_modified FROM files "
+                    f"WHERE app_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                )
+                for app_id, key, *row in rows:
+                    entries[self.entry_key(app_id, key)] = self._entry(row)
+        return entries
+
+    def iter_assets(self) -> Iterator[Tuple[str, str]]:
+        """
+        Yields (app_id, key) for every saved entry.
+        """
+        with self._lock:
+            cursor = self._conn.execute("SELECT app_id, key FROM files")
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(1000)
+            if not rows:
+                return
+            yield from rows
+
+    def record(self, app_id: str, key: str, file_path, data: bytes, **extra):
+        """
+        Records the hash of data just written to file_path.
+        """
+        self.record_digest(app_id, key, file_path, hashlib.sha256(data).hexdigest(), **extra)
+
+    def record_digest(self, app_id: str, key: str, file_path, sha256: str, **extra):
+        """
+        Records a file whose sha256 is already known (e.g. verified while copying it).
+        """
+        entry = self.make_entry(file_path, sha256, **extra)
+        with self._lock:
+            self._changes[(app_id, key)] = entry
+
+    @staticmethod
+    def make_entry(file_path, sha256: str, **extra) -> Dict[str, Any]:
+        st = os.stat(file_path)
+        entry = {
+            "sha256": sha256,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+        }
+        entry.update(extra)
+        return entry
+
+    def merge_journal(self, journal_path) -> int:
+        """
+        Applies the records of a ManifestJournal, saving every MERGE_BATCH records.
+        Call save() afterwards. Returns the number of records merged.
+        """
+        merged = 0
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn last line of a process that was killed mid-write
+                    continue
+                app_id, _, key = record["key"].partition("/")
+                with self._lock:
+                    self._changes[(app_id, key)] = record["entry"]
+                merged += 1
+                if merged % self.MERGE_BATCH == 0:
+                    self.save()
+        return merged
+
+    def remove(self, app_id: str, key: str):
+        with self._lock:
+            self._changes[(app_id, key)] = None
+
+
+class ManifestJournal:
+    """
+    Append-only stand-in for HashManifest, used by mirror shards: each record is one
+    JSON line in the shard's own file, so a shard neither holds nor rewrites the
+    library manifest. Journals are folded in with HashManifest.merge_journal().
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def get(self, app_id: str, key: str) -> Optional[Dict[str, Any]]:
+        # Nothing is kept in memory, so there is never anything to revalidate against
+        return None
+
+    def record(self, app_id: str, key: str, file_path, data: bytes, **extra):
+        self.record_digest(app_id, key, file_path, hashlib.sha256(data).hexdigest(), **extra)
+
+    def record_digest(self, app_id: str, key: str, file_path, sha256: str, **extra):
+        entry = HashManifest.make_entry(file_path, sha256, **extra)
+        line = json.dumps({"key": HashManifest.entry_key(app_id, key), "entry": entry}, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def save(self) -> bool:
+        with self._lock:
+            self._file.flush()
+        return True
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Problem:
+    """
+    A broken or missing artwork file found by verify_library.
+    """
+
+    def __init__(self, app_id: str, key: str, path: str, reason: str):
+        self.app_id = app_id
+        self.key = key
+        self.path = path
+        self.reason = reason
+
+    def __repr__(self):
+        return f"Problem({self.app_id}/{self.key}: {self.reason})"
+
+
+def _sha256_file(f) -> str:
+    f.seek(0)
+    return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _verify_dirs(dirs: List[tuple], manifest: Dict[str, Dict[str, Any]], deep: bool) -> List[tuple]:
+    """
+    Process pool task: checks every artwork file in a chunk of (app_id, folder) pairs.
+    Returns (app_id, key, path, reason) tuples for problems only.
+    """
+    problems = []
+    for app_id, folder in dirs:
+        try:
+            present = {entry.name: entry for entry in os.scandir(folder)}
+        except OSError as e:
+            problems.append((app_id, "", folder, f"unreadable folder: {e}"))
+            continue
+
+        for key, filename in ArtLibrary.LOCAL_FILENAMES.items():
+            expected = manifest.get(HashManifest.entry_key(app_id, key))
+            entry = present.get(filename)
+            if entry is None:
+                if expected is not None:
+                    problems.append((app_id, key, os.path.join(folder, filename), "missing"))
+                continue
+
+            reason = _verify_file(entry, expected, deep)
+            if reason:
+                problems.append((app_id, key, entry.path, reason))
+    return problems
+
+
+def _verify_file(entry: os.DirEntry, expected: Optional[Dict[str, Any]], deep: bool) -> str:
+    try:
+        st = entry.stat()
+        with open(entry.path, "rb") as f:
+            reason = check_image_file(f, st.st_size)
+            if reason or expected is None:
+                return reason
+            if st.st_size != expected.get("size"):
+                return "size differs from manifest"
+            # Unchanged size and mtime means the file is what we wrote; only hash when asked to
+            if deep or st.st_mtime_ns != expected.get("mtime_ns"):
+                if _sha256_file(f) != expected.get("sha256"):
+                    return "hash mismatch"
+    except OSError as e:
+        return f"unreadable: {e}"
+    return ""
+
+
+def verify_library(install_root, workers: Optional[int] = None, deep: bool = False,
+                   chunk_size: int = 64) -> List[Problem]:
+    """
+    Scans every game folder under install_root across a process pool.
+    Each file's magic bytes, header and trailer are checked, then compared against the
+    hash manifest. With deep=True every file is re-hashed even if its mtime is unchanged.
+    """
+    library = ArtLibrary(install_root)
+    library.refresh()
+    dirs = [(app_id, str(path)) for app_id, path in library.game_dirs().items()]
+    manifest = HashManifest(install_root)
+
+    problems = []
+    chunks = [dirs[i:i + chunk_size] for i in range(0, len(dirs), chunk_size)]
+    try:
+        if chunks:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # Only ship the entries a task needs instead of the whole manifest
+                futures = [
+                    pool.submit(_verify_dirs, chunk, manifest.entries_for(app_id for app_id, _ in chunk), deep)
+                    for chunk in chunks
+                ]
+                for future in futures:
+                    problems.extend(Problem(*p) for p in future.result())
+
+        # Manifest entries for games whose folder no longer exists at all
+        known = {app_id for app_id, _ in dirs}
+        for app_id, key in manifest.iter_assets():
+            if app_id not in known:
+                problems.append(Problem(app_id, key, "", "missing"))
+    finally:
+        manifest.close()
+
+    return problems
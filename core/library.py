@@ -0,0 +1,178 @@
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Optional, Dict, Iterator, Tuple
+
+
+class ArtLibrary:
+    """
+    Maps (app_id, key) artwork assets onto the on-disk install_path layout:
+    <install_root>/<Game Name> (<app_id>)/<file name>
+    """
+
+    # Local file name for each artwork key in SteamDBFetcher.URL_TEMPLATES
+    LOCAL_FILENAMES = {
+        "header": "header.jpg",
+        "library_600x900_2x": "library_600x900_2x.jpg",
+        "library_hero_2x": "library_hero_2x.jpg",
+        "logo": "logo.png",
+        "capsule_231x87": "capsule_231x87.jpg"
+    }
+
+    FOLDER_PATTERN = re.compile(r"\((\d+)\)$")
+
+    # Images for games whose name is not known yet are downloaded here, keyed by AppID
+    STAGING_DIR = ".staging"
+
+    def __init__(self, install_root):
+        self.root = Path(install_root)
+        self._dirs: Optional[Dict[str, Path]] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def folder_name(game_name: str, app_id: str) -> str:
+        """
+        Returns the sanitized "Name (app_id)" folder name for a game.
+        """
+        safe_name = "".join([c for c in game_name if c.isalnum() or c in (' ', '-', '_')]).strip()
+        return f"{safe_name} ({app_id})"
+
+    @staticmethod
+    def app_id_from_folder(folder_name: str) -> Optional[str]:
+        match = ArtLibrary.FOLDER_PATTERN.search(folder_name)
+        return match.group(1) if match else None
+
+    def _scan(self) -> Dict[str, Path]:
+        dirs = {}
+        if not self.root.is_dir():
+            return dirs
+        for entry in self.root.iterdir():
+            # Dot entries hold bookkeeping files, not games
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            app_id = self.app_id_from_folder(entry.name)
+            if app_id:
+                dirs[app_id] = entry
+        return dirs
+
+    def refresh(self):
+        """
+        Rescans the install root. Game folders are otherwise cached after the first lookup.
+        """
+        with self._lock:
+            self._dirs = self._scan()
+
+    def game_dirs(self) -> Dict[str, Path]:
+        """
+        Returns {app_id: folder} for every game folder under the install root.
+        """
+        with self._lock:
+            if self._dirs is None:
+                self._dirs = self._scan()
+            return dict(self._dirs)
+
+    def find_game_dir(self, app_id: str) -> Optional[Path]:
+        """
+        Returns the existing folder for app_id, or None if the game was never downloaded.
+        """
+        with self._lock:
+            if self._dirs is None:
+                self._dirs = self._scan()
+            path = self._dirs.get(app_id)
+            if path is not None and not path.is_dir():
+                # Renamed or removed by another process; look again
+                self._dirs = self._scan()
+                path = self._dirs.get(app_id)
+            return path
+
+    def game_dir(self, app_id: str, game_name: str) -> Path:
+        """
+        Returns the folder for app_id, creating "<game_name> (<app_id>)" if none exists yet.
+        """
+        existing = self.find_game_dir(app_id)
+        if existing:
+            return existing
+        path = self.root / self.folder_name(game_name, app_id)
+        path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._dirs[app_id] = path
+        return path
+
+    def staging_dir(self, app_id: str) -> Path:
+        """
+        Returns (and creates) the ID-keyed staging folder used until the game's name is known.
+        """
+        path = self.root / self.STAGING_DIR / app_id
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def place_staged(self, app_id: str, game_name: str, staged_dir: Path) -> Optional[Path]:
+        """
+        Moves a staging folder into its final "Name (app_id)" location with a single rename.
+        If the game folder already exists the staged files are moved into it one by one.
+        Returns the game folder, or None if nothing was staged.
+        """
+        if not any(staged_dir.iterdir()):
+            staged_dir.rmdir()
+            return None
+
+        with self._lock:
+            if self._dirs is None:
+                self._dirs = self._scan()
+            existing = self._dirs.get(app_id)
+            if existing is not None and existing.is_dir():
+                for item in staged_dir.iterdir():
+                    os.replace(item, existing / item.name)
+                staged_dir.rmdir()
+                return existing
+
+            target = self.root / self.folder_name(game_name, app_id)
+            if target.exists():
+                # Same folder name created outside our cache (e.g. by another process)
+                for item in staged_dir.iterdir():
+                    os.replace(item, target / item.name)
+                staged_dir.rmdir()
+            else:
+                os.replace(staged_dir, target)
+            self._dirs[app_id] = target
+            return target
+
+    def rename_game_dir(self, app_id: str, game_name: str) -> Optional[Path]:
+        """
+        Renames an existing game folder to match game_name (e.g. once an
+        "Unknown Game" resolves). Returns the folder's current path.
+        """
+        current = self.find_game_dir(app_id)
+        if current is None:
+            return None
+        target = self.root / self.folder_name(game_name, app_id)
+        if target == current or target.exists():
+            return current
+        with self._lock:
+            os.replace(current, target)
+            self._dirs[app_id] = target
+        return target
+
+    def asset_path(self, app_id: str, key: str) -> Optional[Path]:
+        """
+        Returns where the asset lives (or would live) on disk, or None if the game has no folder.
+        """
+        filename = self.LOCAL_FILENAMES.get(key)
+        base_dir = self.find_game_dir(app_id)
+        if not filename or base_dir is None:
+            return None
+        return base_dir / filename
+
+    def iter_assets(self) -> Iterator[Tuple[str, str, Path]]:
+        """
+        Yields (app_id, key, path) for every artwork file currently on disk.
+        """
+        self.refresh()
+        with self._lock:
+            dirs = list(self._dirs.items())
+        for app_id, base_dir in dirs:
+            for key, filename in self.LOCAL_FILENAMES.items():
+                path = base_dir / filename
+                if path.is_file():
+                    yield app_id, key, path
@@ -0,0 +1,457 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Set
+
+from core.batch import iter_app_ids
+
+logger = logging.getLogger(__name__)
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return exit_code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def shard_of(app_id: str, shard_count: int, strategy: str = "hash", max_app_id: int = 0) -> int:
+    """
+    Maps an AppID onto a shard.
+    'hash' spreads IDs evenly (crc32 modulo shard count); 'range' splits 0..max_app_id
+    into contiguous blocks, which keeps a shard's games together.
+    """
+    if strategy == "range" and max_app_id:
+        return min(shard_count - 1, int(app_id) * shard_count // (max_app_id + 1))
+    return zlib.crc32(app_id.encode()) % shard_count
+
+
+class JobStore:
+    """
+    Shared state for a mirror run, kept in one directory that every participating
+    process (or host, via a network share) can reach:
+
+    - config.json      shard count/strategy, fixed when the store is created
+    - apps.txt         catalog snapshot, so all hosts shard the same ID list
+    - shard-NNNN.lock  claim on a shard (created with O_EXCL, refreshed as a heartbeat)
+    - shard-NNNN.done  append-only checkpoint of finished AppIDs
+    - shard-NNNN.json  per-shard progress metrics
+    - shard-NNNN.manifest.jsonl  hashes of the shard's downloads (a ManifestJournal),
+                       merged into the library's hash manifest when a run ends
+    """
+
+    # A claim whose heartbeat is older than this is considered abandoned
+    LOCK_TIMEOUT = 600
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    # --- Setup ---
+
+    def initialize(self, shard_count: int, strategy: str, app_ids: List[str]):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / "apps.txt", "w") as f:
+            f.write("\n".join(app_ids))
+        max_app_id = max((int(a) for a in app_ids), default=0)
+        config = {"shard_count": shard_count, "strategy": strategy, "max_app_id": max_app_id}
+        with open(self.path / "config.json", "w") as f:
+            json.dump(config, f, indent=4)
+
+    @property
+    def initialized(self) -> bool:
+        return (self.path / "config.json").exists() and (self.path / "apps.txt").exists()
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        with open(self.path / "config.json", "r") as f:
+            return json.load(f)
+
+    def shard_app_ids(self, shard: int) -> Iterator[str]:
+        """
+        Lazily yields the AppIDs belonging to a shard.
+        """
+        config = self.config
+        for app_id in iter_app_ids(self.path / "apps.txt"):
+            if shard_of(app_id, config["shard_count"], config["strategy"], config["max_app_id"]) == shard:
+                yield app_id
+
+    def _file(self, shard: int, suffix: str) -> Path:
+        return self.path / f"shard-{shard:04d}.{suffix}"
+
+    # --- Claims ---
+
+    def claim(self, shard: int) -> bool:
+        """
+        Atomically claims a shard for this host. Stale claims, and claims left by a
+        process on this host that is no longer running, are taken over.
+        """
+        lock = self._file(shard, "lock")
+        owner = f"{socket.gethostname()}:{os.getpid()}"
+        for _ in range(2):
+            try:
+                fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    age = time.time() - lock.stat().st_mtime
+                except FileNotFoundError:
+                    continue
+                if age < self.LOCK_TIMEOUT and not self._owner_dead(lock):
+                    return False
+                logger.warning(f"Taking over stale claim on shard {shard}")
+                try:
+                    lock.unlink()
+                except FileNotFoundError:
+                    pass
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(owner)
+            return True
+        return False
+
+    @staticmethod
+    def _owner_dead(lock: Path) -> bool:
+        try:
+            host, _, pid = lock.read_text().strip().rpartition(":")
+        except OSError:
+            return False
+        return host == socket.gethostname() and pid.isdigit() and not _pid_alive(int(pid))
+
+    def manifest_journal(self, shard: int) -> Path:
+        return self._file(shard, "manifest.jsonl")
+
+    def heartbeat(self, shard: int):
+        try:
+            os.utime(self._file(shard, "lock"))
+        except OSError:
+            pass
+
+    def release(self, shard: int):
+        try:
+            self._file(shard, "lock").unlink()
+        except FileNotFoundError:
+            pass
+
+    # --- Checkpoints and metrics ---
+
+    def done_ids(self, shard: int) -> Set[str]:
+        path = self._file(shard, "done")
+        if not path.exists():
+            return set()
+        with open(path, "r") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def open_checkpoint(self, shard: int):
+        return open(self._file(shard, "done"), "a", buffering=1)
+
+    def write_metrics(self, shard: int, metrics: Dict[str, Any]):
+        path = self._file(shard, "json")
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(metrics, f)
+        os.replace(tmp_path, path)
+
+    def read_metrics(self, shard: int) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._file(shard, "json"), "r") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def is_complete(self, shard: int) -> bool:
+        metrics = self.read_metrics(shard)
+        return bool(metrics and metrics.get("completed"))
+
+
+def run_shard(store_path: str, shard: int, install_root: str, pipeline_settings: Dict[str, int],
+              bandwidth: Dict[str, Any], processes: int, progress_queue):
+    """
+    Worker process entry point: mirrors one shard, resuming from its checkpoint.
+    Gets its own connection pool (sessions are per process).
+
+    `bandwidth` carries the coordinator's limits: "config" (base limits and schedule),
+    "follow_settings" and "requests_per_sec" (the per-shard --rps override, or None).
+    """
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    from core.batch import BatchDownloader
+    from core.integrity import ManifestJournal
+    from core.ratelimit import shaper
+
+    # The shaper is per process: each of the running shards gets its part of the limits
+    shaper.configure(bandwidth["config"])
+    if bandwidth["follow_settings"]:
+        shaper.follow_settings()
+    shaper.share(processes, bandwidth["requests_per_sec"])
+
+    store = JobStore(store_path)
+    done = store.done_ids(shard)
+    metrics = store.read_metrics(shard) or {}
+    metrics.update({
+        "shard": shard,
+        "host": socket.gethostname(),
+        "done": len(done),
+        "succeeded": metrics.get("succeeded", 0),
+        "failed": metrics.get("failed", 0),
+        "images": metrics.get("images", 0),
+        "completed": False,
+    })
+    if "total" not in metrics:
+        metrics["total"] = sum(1 for _ in store.shard_app_ids(shard))
+
+    lock = threading.Lock()
+    last_flush = [time.monotonic()]
+    checkpoint = store.open_checkpoint(shard)
+
+    def on_item(job):
+        with lock:
+            checkpoint.write(f"{job.app_id}\n")
+            metrics["done"] += 1
+            metrics["images"] += job.saved
+            metrics["succeeded" if job.succeeded else "failed"] += 1
+            progress_queue.put((shard, job.app_id, job.succeeded, job.saved))
+
+            # Persist metrics and refresh the claim every few seconds
+            now = time.monotonic()
+            if now - last_flush[0] >= 5:
+                last_flush[0] = now
+                metrics["updated"] = time.time()
+                store.write_metrics(shard, metrics)
+                store.heartbeat(shard)
+
+    pending = (app_id for app_id in store.shard_app_ids(shard) if app_id not in done)
+    # Appending to a journal keeps each shard's manifest I/O proportional to its own downloads
+    journal = ManifestJournal(store.manifest_journal(shard))
+    downloader = BatchDownloader(install_root, settings=pipeline_settings, on_item=on_item, manifest=journal)
+    try:
+        downloader.run(pending)
+        metrics["completed"] = True
+    finally:
+        journal.close()
+        checkpoint.close()
+        metrics["updated"] = time.time()
+        store.write_metrics(shard, metrics)
+
+
+class MirrorCoordinator:
+    """
+    Runs shards of a catalog mirror in separate processes and merges their progress.
+    Several hosts can run a coordinator against the same JobStore; each claims the
+    shards nobody else is working on.
+    """
+
+    # Seconds between merged progress reports
+    REPORT_INTERVAL = 10
+    # Seconds to let shard processes checkpoint after an interrupt before killing them
+    SHUTDOWN_WAIT = 30
+
+    def __init__(self, store_path, install_root, shard_count: int = 16, processes: int = 4,
+                 strategy: str = "hash", requests_per_second: Optional[float] = None,
+                 pipeline_settings: Optional[Dict[str, int]] = None):
+        """
+        Shards use this process's bandwidth limits, split between the running shard
+        processes. requests_per_second, if given, is each shard's own request budget instead.
+        """
+        self.store = JobStore(store_path)
+        self.install_root = str(install_root)
+        self.shard_count = shard_count
+        self.processes = max(1, processes)
+        self.strategy = strategy
+        self.requests_per_second = requests_per_second
+        self.pipeline_settings = pipeline_settings or {}
+
+    def prepare(self, app_ids: Optional[List[str]] = None) -> bool:
+        """
+        Creates the job store on first use. Without app_ids the full Steam catalog is used.
+        """
+        if self.store.initialized:
+            self.shard_count = self.store.config["shard_count"]
+            return True
+
+        if app_ids is None:
+            from core.steamdb import SteamDBFetcher
+            logger.info("Fetching Steam app list...")
+            apps = SteamDBFetcher.get_app_list()
+            app_ids = [app_id for app_id, _ in apps]
+            self._seed_names(apps)
+        if not app_ids:
+            logger.error("No AppIDs to mirror.")
+            return False
+
+        self.store.initialize(self.shard_count, self.strategy, app_ids)
+        logger.info(f"Created job store with {len(app_ids)} apps in {self.shard_count} shards.")
+        return True
+
+    def _seed_names(self, apps: List[tuple]):
+        """
+        Caches the names from the app list, so shards don't need an appdetails
+        request (rate limited by Steam) per game just to name its folder.
+        """
+        from core.names import NameCache
+
+        names = NameCache(self.install_root)
+        seeded = 0
+        for app_id, name in apps:
+            if name and names.get(app_id) is None:
+                names.set(app_id, name)
+                seeded += 1
+        names.save()
+        logger.info(f"Cached {seeded} game names from the app list.")
+
+    def run(self):
+        from core.ratelimit import shaper
+
+        ctx = multiprocessing.get_context("spawn")
+        progress_queue = ctx.Queue()
+        # Shards claimed by another host are skipped for this run
+        pending = [s for s in range(self.shard_count) if not self.store.is_complete(s)]
+        running: Dict[int, multiprocessing.Process] = {}
+        stats = {"games": 0, "succeeded": 0, "images": 0}
+        bandwidth = {
+            "config": shaper.config,
+            "follow_settings": shaper.following_settings,
+            "requests_per_sec": self.requests_per_second,
+        }
+        started = time.monotonic()
+        last_report = started
+
+        try:
+            while pending or running:
+                # Fill free slots with shards nobody else has claimed
+                for shard in list(pending):
+                    if len(running) >= self.processes:
+                        break
+                    pending.remove(shard)
+                    if not self.store.claim(shard):
+                        continue
+                    process = ctx.Process(
+                        target=run_shard,
+                        args=(str(self.store.path), shard, self.install_root, self.pipeline_settings,
+                              bandwidth, self.processes, progress_queue),
+                        name=f"mirror-shard-{shard}",
+                    )
+                    process.start()
+                    running[shard] = process
+                    logger.info(f"Started shard {shard} (pid {process.pid}).")
+
+                self._drain(progress_queue, stats)
+
+                for shard, process in list(running.items()):
+                    if not process.is_alive():
+                        process.join()
+                        self.store.release(shard)
+                        del running[shard]
+                        if process.exitcode == 0:
+                            logger.info(f"Shard {shard} finished.")
+                        else:
+                            logger.error(f"Shard {shard} exited with code {process.exitcode}; it will resume from its checkpoint on the next run.")
+                    else:
+                        self.store.heartbeat(shard)
+
+                now = time.monotonic()
+                if now - last_report >= self.REPORT_INTERVAL:
+                    last_report = now
+                    self.report(stats, now - started)
+        finally:
+            # On Ctrl+C the shards get the interrupt too; let them write their checkpoints
+            # (draining the progress queue so they can exit), then free the claims so the
+            # next run can resume them straight away
+            deadline = time.monotonic() + self.SHUTDOWN_WAIT
+            while any(p.is_alive() for p in running.values()) and time.monotonic() < deadline:
+                self._drain(progress_queue, stats)
+            for shard, process in running.items():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+                self.store.release(shard)
+
+        self._drain(progress_queue, stats)
+        self.report(stats, time.monotonic() - started)
+        self.merge_manifests()
+
+    def merge_manifests(self) -> int:
+        """
+        Folds the hash journals of shards nobody is running into the library manifest.
+        Returns the number of records merged.
+        """
+        from core.integrity import HashManifest
+
+        claimed = [
+            shard for shard in range(self.shard_count)
+            if self.store.manifest_journal(shard).exists() and self.store.claim(shard)
+        ]
+        if not claimed:
+            return 0
+
+        merged = 0
+        try:
+            manifest = HashManifest(self.install_root)
+            try:
+                for shard in claimed:
+                    count = manifest.merge_journal(self.store.manifest_journal(shard))
+                    if manifest.save():
+                        self.store.manifest_journal(shard).unlink()
+                        merged += count
+                logger.info(f"Merged {merged} hash records into the library manifest.")
+            finally:
+                manifest.close()
+        finally:
+            for shard in claimed:
+                self.store.release(shard)
+        return merged
+
+    @staticmethod
+    def _drain(progress_queue, stats: Dict[str, int]):
+        try:
+            while True:
+                _, _, succeeded, saved = progress_queue.get(timeout=1)
+                stats["games"] += 1
+                stats["succeeded"] += int(succeeded)
+                stats["images"] += saved
+        except queue.Empty:
+            pass
+
+    def merged_metrics(self) -> Dict[str, Any]:
+        """
+        Combines the metrics of every shard, including shards run by other hosts.
+        """
+        totals = {"total": 0, "done": 0, "succeeded": 0, "failed": 0, "images": 0, "completed_shards": 0}
+        for shard in range(self.shard_count):
+            metrics = self.store.read_metrics(shard)
+            if not metrics:
+                continue
+            for key in ("total", "done", "succeeded", "failed", "images"):
+                totals[key] += metrics.get(key, 0)
+            totals["completed_shards"] += int(bool(metrics.get("completed")))
+        return totals
+
+    def report(self, stats: Dict[str, int], elapsed: float):
+        totals = self.merged_metrics()
+        rate = stats["games"] / elapsed if elapsed else 0.0
+        remaining = max(0, totals["total"] - totals["done"])
+        eta = f"{remaining / rate / 3600:.1f} h" if rate else "unknown"
+        logger.info(
+            f"Mirror: {totals['done']}/{totals['total']} games across all hosts "
+            f"({totals['completed_shards']}/{self.shard_count} shards complete, {totals['images']} images). "
+            f"This host: {stats['games']} games at {rate:.1f}/s, ETA {eta}."
+        )
@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from core.filelock import FileLock
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_NAME = "Unknown Game"
+
+
+class NameCache:
+    """
+    Persists resolved game names in <install_root>/.names.json so repeat batches
+    don't need an appdetails round trip per game.
+    """
+    FILENAME = ".names.json"
+
+    # Apps the store reported as unknown ("Unknown Game") are looked up again after this many seconds
+    UNKNOWN_RETRY_AFTER = 24 * 3600
+    # Seconds to wait for another process to finish writing the cache
+    LOCK_WAIT = 30
+
+    def __init__(self, install_root):
+        self.path = Path(install_root) / self.FILENAME
+        self._lock = threading.Lock()
+        self._names: Dict[str, Dict[str, Any]] = self._load()
+        # Names set since the last save, merged into the file on save
+        self._changes: Dict[str, Dict[str, Any]] = {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.error(f"Error loading name cache: {e}")
+            return {}
+
+    def save(self):
+        """
+        Merges this instance's new names into the cache file under a lock file, so
+        mirror shards, watch mode and the GUI can share one install folder.
+        """
+        with self._lock:
+            if not self._changes:
+                return
+            changes = self._changes
+            self._changes = {}
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with FileLock(self.path.with_suffix(".lock"), self.LOCK_WAIT):
+                names = self._load()
+                names.update(changes)
+                tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(names, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error saving name cache: {e}")
+            # Retry these names on the next save
+            with self._lock:
+                for app_id, entry in changes.items():
+                    self._changes.setdefault(app_id, entry)
+            return
+
+        with self._lock:
+            # Keep names set while we were writing; they go out with the next save
+            names.update(self._changes)
+            self._names = names
+
+    def get(self, app_id: str) -> Optional[str]:
+        """
+        Returns the cached name, or None if unknown or due for a retry.
+        """
+        with self._lock:
+            entry = self._names.get(app_id)
+        if entry is None:
+            return None
+        if entry["name"] == UNKNOWN_NAME and time.time() - entry.get("ts", 0) > self.UNKNOWN_RETRY_AFTER:
+            return None
+        return entry["name"]
+
+    def set(self, app_id: str, name: str):
+        with self._lock:
+            entry = {"name": name, "ts": int(time.time())}
+            self._names[app_id] = entry
+            self._changes[app_id] = entry
+
+    def items(self) -> Dict[str, str]:
+        with self._lock:
+            return {app_id: entry["name"] for app_id, entry in self._names.items()}
+
+
+class NameResolver:
+    """
+    Resolves game names on a background thread pool so callers never wait on
+    appdetails before starting other work. Each lookup returns a Future.
+    """
+
+    def __init__(self, cache: NameCache, workers: int = 4):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="name-resolve")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, app_id: str) -> Future:
+        cached = self.cache.get(app_id)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        # Share one request between concurrent lookups of the same game
+        with self._lock:
+            future = self._pending.get(app_id)
+            if future is None:
+                future = self._executor.submit(self._resolve, app_id)
+                self._pending[app_id] = future
+            return future
+
+    def _resolve(self, app_id: str) -> str:
+        from core.steamdb import SteamDBFetcher
+        try:
+            name = SteamDBFetcher.lookup_game_name(app_id)
+            if name is None:
+                # Failed request (e.g. rate limited): don't cache it, the next batch asks again
+                return UNKNOWN_NAME
+            self.cache.set(app_id, name)
+            return name
+        finally:
+            with self._lock:
+                self._pending.pop(app_id, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+        self.cache.save()
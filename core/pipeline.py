@@ -0,0 +1,110 @@
+import logging
+import queue
+import threading
+from typing import Callable, Iterable, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of the stream on a stage's input queue
+_DONE = object()
+
+
+class Stage:
+    """
+    One step of a Pipeline.
+    `func` receives an item and returns the item to pass downstream, or None to drop it.
+    `workers` threads run the stage concurrently.
+    """
+
+    def __init__(self, name: str, func: Callable[[Any], Any], workers: int = 1):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+
+
+class Pipeline:
+    """
+    Runs items through a chain of stages connected by bounded queues.
+
+    The source iterable is consumed lazily and every queue holds at most `queue_size`
+    items, so a slow stage blocks the stages before it (backpressure) and memory use
+    stays constant no matter how long the input is.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 16):
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        self.stages = stages
+        self.queue_size = max(1, int(queue_size))
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        """
+        Stops pulling new items from the source. Items already in flight still run
+        through every stage, so none is left half-processed; a stage can check
+        `stopped` to skip expensive work for them.
+        """
+        self._stop_event.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run(self, source: Iterable):
+        """
+        Feeds `source` through all stages and blocks until every item has left the last stage.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+
+        for index, stage in enumerate(self.stages):
+            out_queue = queues[index + 1] if index + 1 < len(queues) else None
+            next_workers = self.stages[index + 1].workers if out_queue is not None else 0
+            remaining = [stage.workers]
+            lock = threading.Lock()
+
+            for n in range(stage.workers):
+                t = threading.Thread(
+                    target=self._stage_loop,
+                    args=(stage, queues[index], out_queue, next_workers, remaining, lock),
+                    name=f"pipeline-{stage.name}-{n}",
+                    daemon=True,
+                )
+                t.start()
+                threads.append(t)
+
+        try:
+            for item in source:
+                if self.stopped:
+                    break
+                queues[0].put(item)
+        finally:
+            # Also on a failing source: let items in flight finish before the error propagates
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+            for t in threads:
+                t.join()
+
+    def _stage_loop(self, stage: Stage, in_queue: queue.Queue, out_queue: Optional[queue.Queue],
+                    next_workers: int, remaining: list, lock: threading.Lock):
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                break
+
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                logger.error(f"Pipeline stage '{stage.name}' failed: {e}")
+                continue
+
+            if result is not None and out_queue is not None:
+                out_queue.put(result)
+
+        # The last worker of a stage to finish closes the next stage's input
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last and out_queue is not None:
+            for _ in range(next_workers):
+                out_queue.put(_DONE)
@@ -0,0 +1,199 @@
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `rate` tokens are added per second up to `capacity`;
+    acquire() blocks until the requested tokens are paid for. A rate of 0 means unlimited.
+
+    Callers reserve tokens up front and the balance may go negative; each caller then
+    sleeps off its own share of the debt. This keeps the long-run rate exact for any
+    number of concurrent callers and for requests larger than the bucket.
+    """
+
+    def __init__(self, rate: float, capacity: float = 0):
+        self._lock = threading.Lock()
+        self.rate = 0.0
+        self.capacity = 0.0
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate, capacity)
+
+    def set_rate(self, rate: float, capacity: float = 0):
+        """
+        Changes the rate at runtime. Capacity defaults to one second's worth of tokens.
+        """
+        with self._lock:
+            self._refill()
+            self.rate = max(0.0, float(rate))
+            self.capacity = float(capacity) if capacity else max(1.0, self.rate)
+            self._tokens = min(self._tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1.0):
+        """
+        Takes `tokens` from the bucket, sleeping until they are paid for.
+        """
+        with self._lock:
+            if not self.rate:
+                return
+            self._refill()
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+
+
+class BandwidthShaper:
+    """
+    Process-wide byte and request budget shared by every fetch path.
+
+    Limits come from a base setting plus an optional schedule of time windows, e.g.
+    full speed at night:
+        {"bytes_per_sec": 500000, "requests_per_sec": 10,
+         "schedule": [{"start": "22:00", "end": "07:00", "bytes_per_sec": 0, "requests_per_sec": 0}]}
+    0 means unlimited. Limits can be changed at any time with configure(); when
+    follow_settings() is enabled, edits to settings.json are picked up automatically.
+    """
+
+    # Seconds between checks of the schedule and the settings file
+    REFRESH_INTERVAL = 5
+    # Burst allowance as a fraction of one second's budget; small keeps the rate smooth
+    BURST_SECONDS = 0.25
+
+    def __init__(self):
+        self.requests = TokenBucket(0)
+        self.bytes = TokenBucket(0)
+        self._lock = threading.Lock()
+        self._config = {}
+        self._active = (0.0, 0.0)
+        self._next_refresh = 0.0
+        self._follow_settings = False
+        self._settings_mtime = None
+        # Set by share(): this process's fraction of the limits and its own request budget
+        self._processes = 1
+        self._requests_override: Optional[float] = None
+
+    def configure(self, config: dict):
+        """
+        Replaces the base limits and schedule; takes effect immediately, also for
+        transfers already in progress.
+        """
+        with self._lock:
+            self._config = dict(config or {})
+            self._next_refresh = 0.0
+        self._refresh(force=True)
+
+    def follow_settings(self, enabled: bool = True):
+        """
+        Re-reads the 'bandwidth' section of settings.json whenever the file changes.
+        """
+        with self._lock:
+            self._follow_settings = enabled
+            self._settings_mtime = None
+            self._next_refresh = 0.0
+
+    def share(self, processes: int, requests_per_sec: Optional[float] = None):
+        """
+        For one of `processes` processes downloading at once: each gets an equal part
+        of the configured byte and request rates, so together they stay within them.
+        A requests_per_sec other than None replaces this process's request rate instead.
+        """
+        with self._lock:
+            self._processes = max(1, int(processes))
+            self._requests_override = requests_per_sec
+        self._refresh(force=True)
+
+    @property
+    def config(self) -> dict:
+        """
+        Copy of the base limits and schedule in use.
+        """
+        with self._lock:
+            return dict(self._config)
+
+    @property
+    def following_settings(self) -> bool:
+        return self._follow_settings
+
+    @property
+    def limits(self):
+        """
+        Currently active (bytes_per_sec, requests_per_sec).
+        """
+        return self._active
+
+    def acquire_request(self):
+        self._refresh()
+        self.requests.acquire()
+
+    def acquire_bytes(self, count: int):
+        self._refresh()
+        self.bytes.acquire(count)
+
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        with self._lock:
+            if not force and now < self._next_refresh:
+                return
+            self._next_refresh = now + self.REFRESH_INTERVAL
+            follow = self._follow_settings
+
+        if follow:
+            self._reload_settings()
+
+        with self._lock:
+            bytes_per_sec, requests_per_sec = self._limits_at(time.localtime(), self._config)
+            if self._requests_override is not None:
+                requests_per_sec = float(self._requests_override)
+            else:
+                requests_per_sec /= self._processes
+            active = (bytes_per_sec / self._processes, requests_per_sec)
+            if active == self._active and not force:
+                return
+            self._active = active
+        bytes_per_sec, requests_per_sec = active
+        self.bytes.set_rate(bytes_per_sec, bytes_per_sec * self.BURST_SECONDS)
+        self.requests.set_rate(requests_per_sec)
+
+    def _reload_settings(self):
+        from core.settings import SettingsManager
+        try:
+            mtime = SettingsManager.SETTINGS_FILE.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._settings_mtime:
+            return
+        self._settings_mtime = mtime
+        with self._lock:
+            self._config = SettingsManager().bandwidth
+
+    @staticmethod
+    def _minutes(hhmm: str) -> int:
+        hours, _, minutes = hhmm.partition(":")
+        return int(hours) * 60 + int(minutes or 0)
+
+    @classmethod
+    def _limits_at(cls, now: time.struct_time, config: dict):
+        current = now.tm_hour * 60 + now.tm_min
+        for window in config.get("schedule", []):
+            try:
+                start, end = cls._minutes(window["start"]), cls._minutes(window["end"])
+            except (KeyError, ValueError):
+                continue
+            # Windows may wrap around midnight (e.g. 22:00-07:00)
+            inside = start <= current < end if start <= end else (current >= start or current < end)
+            if inside:
+                return (float(window.get("bytes_per_sec", 0)), float(window.get("requests_per_sec", 0)))
+        return (float(config.get("bytes_per_sec", 0)), float(config.get("requests_per_sec", 0)))
+
+
+# Shared by SteamDBFetcher and everything built on it
+shaper = BandwidthShaper()
@@ -16,6 +16,26 @@ class SettingsManager:
             "hero": True,
             "logo": True,
             "library_600x900": True
+        },
+        # Worker threads per batch stage (resolve = parallel name lookups) and bounded queue size between stages
+        "pipeline": {
+            "resolve_workers": 4,
+            "fetch_workers": 8,
+            "write_workers": 2,
+            "place_workers": 1,
+            "publish_workers": 1,
+            "queue_size": 8
+        },
+        # Download limits shared by all fetches (0 = unlimited); schedule windows override them
+        "bandwidth": {
+            "bytes_per_sec": 0,
+            "requests_per_sec": 0,
+            "schedule": []
+        },
+        # UI stall watchdog threshold and per-batch cProfile/tracemalloc capture
+        "diagnostics": {
+            "stall_threshold_ms": 250,
+            "profile_batches": False
         }
     }
 
@@ -70,3 +90,40 @@ class SettingsManager:
     def install_path(self, path: str):
         self._settings["install_path"] = path
         self.save_settings()
+
+    @property
+    def pipeline(self) -> Dict[str, int]:
+        """
+        Returns the batch pipeline concurrency settings, filled in with defaults.
+        """
+        pipeline = dict(self.DEFAULT_SETTINGS["pipeline"])
+        pipeline.update(self._settings.get("pipeline", {}))
+        return pipeline
+
+    @property
+    def bandwidth(self) -> Dict[str, Any]:
+        """
+        Returns the bandwidth limits and schedule, filled in with defaults.
+        """
+        bandwidth = dict(self.DEFAULT_SETTINGS["bandwidth"])
+        bandwidth.update(self._settings.get("bandwidth", {}))
+        return bandwidth
+
+    @bandwidth.setter
+    def bandwidth(self, value: Dict[str, Any]):
+        self._settings["bandwidth"] = value
+        self.save_settings()
+
+    @property
+    def diagnostics(self) -> Dict[str, Any]:
+        """
+        Returns the diagnostics settings, filled in with defaults.
+        """
+        diagnostics = dict(self.DEFAULT_SETTINGS["diagnostics"])
+        diagnostics.update(self._settings.get("diagnostics", {}))
+        return diagnostics
+
+    @diagnostics.setter
+    def diagnostics(self, value: Dict[str, Any]):
+        self._settings["diagnostics"] = value
+        self.save_settings()
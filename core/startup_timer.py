@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    Records how long imports and window construction take until the first interactive frame.
+    Enabled with the SAD_STARTUP_PROFILE=1 environment variable or `main.py --profile-startup`;
+    when disabled every call is a no-op.
+    """
+    ENV_VAR = "SAD_STARTUP_PROFILE"
+
+    def __init__(self):
+        self.enabled = os.environ.get(self.ENV_VAR, "") not in ("", "0")
+        self._start = time.perf_counter()
+        self._spans: List[Tuple[str, float, float]] = []  # label, offset, duration
+
+    def enable(self):
+        self.enabled = True
+
+    @contextmanager
+    def measure(self, label: str):
+        """
+        Times the enclosed block (e.g. an import or a widget constructor).
+        """
+        if not self.enabled:
+            yield
+            return
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._spans.append((label, begin - self._start, end - begin))
+
+    def mark(self, label: str):
+        """
+        Records a point in time (e.g. "first paint") relative to process start.
+        """
+        if self.enabled:
+            self._spans.append((label, time.perf_counter() - self._start, 0.0))
+
+    def report(self):
+        """
+        Logs the timeline and prints it to stderr.
+        """
+        if not self.enabled:
+            return
+        lines = ["Startup timing (offset from start / duration):"]
+        for label, offset, duration in self._spans:
+            span = f"{duration * 1000:8.1f} ms" if duration else " " * 11
+            lines.append(f"  {offset * 1000:8.1f} ms  {span}  {label}")
+        text = "\n".join(lines)
+        logger.info(text)
+        print(text, file=sys.stderr)
+
+
+# Shared instance; created at import time, so import this module first for an accurate zero point
+startup_timer = StartupTimer()
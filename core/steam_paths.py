@@ -1,5 +1,7 @@
 import platform
 import os
+import re
+import shutil
 from pathlib import Path
 from typing import Optional, List
 
@@ -14,6 +16,16 @@ class SteamPathDetector:
     Detects Steam installation and userdata directories across platforms.
     """
 
+    # File name Steam expects in config/grid for each artwork key ('capsule' has no grid slot)
+    GRID_FILENAMES = {
+        "header": "{app_id}.jpg",
+        "library_600x900_2x": "{app_id}p.jpg",
+        "library_hero_2x": "{app_id}_hero.jpg",
+        "logo": "{app_id}_logo.png",
+    }
+
+    LIBRARY_PATH_PATTERN = re.compile(r'"path"\s+"([^"]+)"')
+
     @staticmethod
     def get_steam_install_path(settings_path: str = "") -> Optional[Path]:
         """
@@ -134,3 +146,49 @@ class SteamPathDetector:
             return True
         except OSError:
             return False
+
+    @staticmethod
+    def get_library_paths(steam_root: Path) -> List[Path]:
+        """
+        Returns the 'steamapps' directory of every Steam library, starting with the
+        one inside steam_root, as listed in steamapps/libraryfolders.vdf.
+        """
+        libraries = []
+        default = steam_root / "steamapps"
+        if default.is_dir():
+            libraries.append(default)
+
+        vdf = default / "libraryfolders.vdf"
+        try:
+            content = vdf.read_text(encoding="utf-8", errors="ignore")
+        except OSError:
+            return libraries
+
+        for raw_path in SteamPathDetector.LIBRARY_PATH_PATTERN.findall(content):
+            steamapps = Path(raw_path.replace("\\\\", "\\")) / "steamapps"
+            if steamapps.is_dir() and all(not steamapps.samefile(p) for p in libraries):
+                libraries.append(steamapps)
+        return libraries
+
+    @staticmethod
+    def install_grid_art(game_dir: Path, app_id: str, grid_paths: List[Path]) -> int:
+        """
+        Copies downloaded artwork from game_dir into each user's config/grid folder
+        under the names Steam uses for custom artwork. Returns the number of files copied.
+        """
+        from core.library import ArtLibrary
+
+        copied = 0
+        for grid_path in grid_paths:
+            if not SteamPathDetector.ensure_grid_dir(grid_path):
+                continue
+            for key, grid_name in SteamPathDetector.GRID_FILENAMES.items():
+                source = game_dir / ArtLibrary.LOCAL_FILENAMES[key]
+                if not source.is_file():
+                    continue
+                try:
+                    shutil.copyfile(source, grid_path / grid_name.format(app_id=app_id))
+                    copied += 1
+                except OSError:
+                    pass
+        return copied
@@ -1,7 +1,13 @@
 import requests
-from typing import Optional, Dict
+import json
+import os
+import threading
+from typing import Optional, Dict, Tuple
 import logging
 
+from core.imageinfo import check_image_bytes
+from core.ratelimit import shaper
+
 logger = logging.getLogger(__name__)
 
 class SteamDBFetcher:
@@ -22,36 +28,108 @@ class SteamDBFetcher:
         "User-Agent": "SteamArtDownloader/1.0 (Educational/Personal Project)"
     }
 
+    APP_LIST_URL = "https://api.steampowered.com/ISteamApps/GetAppList/v2/"
+
+    # Response bodies are read in chunks of this size so the byte budget is applied smoothly
+    CHUNK_SIZE = 16 * 1024
+
+    # One keep-alive session (connection pool) per thread; each process gets its own
+    _local = threading.local()
+
+    @staticmethod
+    def _session() -> requests.Session:
+        session = getattr(SteamDBFetcher._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(SteamDBFetcher.HEADERS)
+            SteamDBFetcher._local.session = session
+        return session
+
+    @staticmethod
+    def _get(url: str, timeout: float = 5, headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """
+        Issues a streaming GET through the pooled session, honouring the request budget.
+        Read the body with _read_body() and use the response as a context manager.
+        """
+        shaper.acquire_request()
+        return SteamDBFetcher._session().get(url, timeout=timeout, headers=headers, stream=True)
+
+    @staticmethod
+    def _read_body(response: requests.Response) -> bytes:
+        """
+        Reads a streamed response body, paying the byte budget as each chunk arrives.
+        """
+        chunks = []
+        for chunk in response.iter_content(chunk_size=SteamDBFetcher.CHUNK_SIZE):
+            shaper.acquire_bytes(len(chunk))
+            chunks.append(chunk)
+        return b"".join(chunks)
+
     @staticmethod
     def fetch_image(app_id: str, key: str) -> Optional[bytes]:
         """
         Fetches a single artwork image by key (e.g., 'header', 'logo').
         """
+        data, _validators, _not_modified = SteamDBFetcher.fetch_image_conditional(app_id, key)
+        return data
+
+    @staticmethod
+    def fetch_image_conditional(app_id: str, key: str, etag: str = "",
+                                last_modified: str = "") -> Tuple[Optional[bytes], Dict[str, str], bool]:
+        """
+        Fetches an artwork image, revalidating with If-None-Match/If-Modified-Since when
+        validators from an earlier download are given.
+        Returns (data, validators, not_modified); data is None when the copy on disk is
+        still current (not_modified) or the fetch failed.
+        """
         if not app_id.isdigit():
             logger.error(f"Invalid AppID: {app_id}")
-            return None
+            return None, {}, False
             
         url_template = SteamDBFetcher.URL_TEMPLATES.get(key)
         if not url_template:
             logger.error(f"Invalid artwork type: {key}")
-            return None
+            return None, {}, False
             
         url = url_template.format(app_id=app_id)
         logger.info(f"Fetching {key}: {url}")
+
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
         
         try:
             # Short timeout to keep UI snappy if threaded
-            response = requests.get(url, headers=SteamDBFetcher.HEADERS, timeout=5)
-            
-            if response.status_code == 200 and 'image' in response.headers.get('content-type', ''):
-                return response.content
-            else:
-                logger.warning(f"Failed to fetch {key} (Status: {response.status_code})")
-                return None
+            with SteamDBFetcher._get(url, headers=headers) as response:
+                if response.status_code == 304 and headers:
+                    return None, {"etag": etag, "last_modified": last_modified}, True
+                if response.status_code != 200 or 'image' not in response.headers.get('content-type', ''):
+                    logger.warning(f"Failed to fetch {key} (Status: {response.status_code})")
+                    return None, {}, False
+                data = SteamDBFetcher._read_body(response)
+
+                # Reject short reads and HTML/error bodies served with an image content-type
+                expected_length = response.headers.get('content-length', '')
+                encoded = 'content-encoding' in response.headers
+                if expected_length.isdigit() and not encoded and int(expected_length) != len(data):
+                    logger.warning(f"Incomplete {key} for {app_id} ({len(data)}/{expected_length} bytes)")
+                    return None, {}, False
+                validators = {
+                    name: response.headers[header]
+                    for name, header in (("etag", 'etag'), ("last_modified", 'last-modified'))
+                    if response.headers.get(header)
+                }
+            problem = check_image_bytes(data)
+            if problem:
+                logger.warning(f"Invalid {key} for {app_id}: {problem}")
+                return None, {}, False
+            return data, validators, False
         
         except requests.RequestException as e:
             logger.error(f"Error fetching {key}: {e}")
-            return None
+            return None, {}, False
 
     @staticmethod
     def fetch_all_artwork(app_id: str) -> Dict[str, Optional[bytes]]:
@@ -70,17 +148,33 @@ class SteamDBFetcher:
         Fetches the game name from the Steam Store API.
         Returns "Unknown Game" if fetch fails.
         """
+        return SteamDBFetcher.lookup_game_name(app_id) or "Unknown Game"
+
+    @staticmethod
+    def lookup_game_name(app_id: str) -> Optional[str]:
+        """
+        Like get_game_name, but tells a definite answer from a failed request:
+        returns "Unknown Game" when the store says the app doesn't exist, and None
+        when the request failed (rate limit, timeout, bad response) and is worth retrying.
+        """
         url = f"https://store.steampowered.com/api/appdetails?appids={app_id}"
         try:
-            response = requests.get(url, headers=SteamDBFetcher.HEADERS, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data and str(app_id) in data and data[str(app_id)]['success']:
-                    return data[str(app_id)]['data']['name']
+            with SteamDBFetcher._get(url) as response:
+                if response.status_code != 200:
+                    logger.warning(f"Name lookup for {app_id} failed with HTTP {response.status_code}")
+                    return None
+                data = json.loads(SteamDBFetcher._read_body(response))
         except Exception as e:
             logger.error(f"Error fetching game name: {e}")
-        
-        return "Unknown Game"
+            return None
+
+        entry = data.get(str(app_id)) if isinstance(data, dict) else None
+        if entry is None:
+            logger.warning(f"Name lookup for {app_id} returned no entry")
+            return None
+        if not entry.get("success"):
+            return "Unknown Game"
+        return (entry.get("data") or {}).get("name") or None
 
     @staticmethod
     def search_games(query: str) -> list[dict]:
@@ -91,16 +185,16 @@ class SteamDBFetcher:
         url = f"https://store.steampowered.com/api/storesearch/?term={query}&l=english&cc=US"
         results = []
         try:
-            response = requests.get(url, headers=SteamDBFetcher.HEADERS, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data and 'items' in data:
-                    for item in data['items']:
-                        results.append({
-                            'id': item['id'],
-                            'name': item['name'],
-                            'img': item.get('tiny_image', '')
-                        })
+            with SteamDBFetcher._get(url) as response:
+                if response.status_code == 200:
+                    data = json.loads(SteamDBFetcher._read_body(response))
+                    if data and 'items' in data:
+                        for item in data['items']:
+                            results.append({
+                                'id': item['id'],
+                                'name': item['name'],
+                                'img': item.get('tiny_image', '')
+                            })
         except Exception as e:
             logger.error(f"Error searching games: {e}")
         return results
@@ -109,11 +203,34 @@ class SteamDBFetcher:
     def save_image(img_data: bytes, file_path: str) -> bool:
         """
         Saves the image data to the specified location.
+        The data is written to a temporary file first and moved into place, so an
+        interrupted write never leaves a partial image behind.
         """
+        tmp_path = f"{file_path}.part"
         try:
-            with open(file_path, "wb") as f:
+            with open(tmp_path, "wb") as f:
                 f.write(img_data)
+            os.replace(tmp_path, file_path)
             return True
         except OSError as e:
             logger.error(f"Error saving file to {file_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
             return False
+
+    @staticmethod
+    def get_app_list() -> list[tuple[str, str]]:
+        """
+        Returns (app_id, name) for every app in the Steam catalog, or an empty list if
+        the request fails. The name is empty when Steam doesn't list one.
+        """
+        try:
+            with SteamDBFetcher._get(SteamDBFetcher.APP_LIST_URL, timeout=60) as response:
+                if response.status_code == 200:
+                    apps = json.loads(SteamDBFetcher._read_body(response)).get('applist', {}).get('apps', [])
+                    return [(str(app['appid']), app.get('name', '').strip()) for app in apps if 'appid' in app]
+        except Exception as e:
+            logger.error(f"Error fetching app list: {e}")
+        return []
@@ -0,0 +1,247 @@
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Set
+
+# Try to import watchdog for native filesystem events (inotify, ReadDirectoryChangesW, FSEvents)
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_PATTERN = re.compile(r"^appmanifest_(\d+)\.acf$")
+
+
+class _ManifestEventHandler(FileSystemEventHandler):
+    def __init__(self, on_written: Callable[[str], None], on_removed: Callable[[str], None]):
+        super().__init__()
+        self.on_written = on_written
+        self.on_removed = on_removed
+
+    def on_created(self, event):
+        self._check(event.src_path, self.on_written)
+
+    def on_moved(self, event):
+        # Steam writes manifests to a temp file and renames it into place
+        self._check(event.dest_path, self.on_written)
+
+    def on_deleted(self, event):
+        self._check(event.src_path, self.on_removed)
+
+    @staticmethod
+    def _check(path: str, callback: Callable[[str], None]):
+        match = MANIFEST_PATTERN.match(os.path.basename(path))
+        if match:
+            callback(match.group(1))
+
+
+class LibraryWatcher:
+    """
+    Watches Steam library 'steamapps' folders for new appmanifest_<id>.acf files
+    and hands the new AppIDs to `on_batch` in debounced, coalesced batches.
+
+    Native filesystem events are used when the optional 'watchdog' package is
+    installed; otherwise the folders are polled with a cheap directory listing.
+
+    If `on_batch` has a stop() method, stop() calls it so a batch in progress
+    finishes early instead of running to the end.
+    """
+
+    # Flush once no new manifest has appeared for this many seconds...
+    DEBOUNCE = 5
+    # ...or once the oldest pending AppID has waited this long
+    MAX_DELAY = 60
+    # Directory listing interval when watchdog is not available
+    POLL_INTERVAL = 15
+
+    def __init__(self, library_paths: List[Path], on_batch: Callable[[List[str]], None]):
+        self.library_paths = library_paths
+        self.on_batch = on_batch
+        self._pending: Set[str] = set()
+        # AppIDs with a manifest on disk; Steam rewrites these on every update or state change
+        self._known: Set[str] = set()
+        self._known_lock = threading.Lock()
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def scan_manifests(steamapps: Path) -> Set[str]:
+        ids = set()
+        try:
+            for entry in os.scandir(steamapps):
+                match = MANIFEST_PATTERN.match(entry.name)
+                if match:
+                    ids.add(match.group(1))
+        except OSError as e:
+            logger.warning(f"Cannot list {steamapps}: {e}")
+        return ids
+
+    def installed_app_ids(self) -> Set[str]:
+        ids = set()
+        for steamapps in self.library_paths:
+            ids |= self.scan_manifests(steamapps)
+        return ids
+
+    def queue_app(self, app_id: str):
+        """
+        Records a newly seen AppID; the flush thread batches it with its neighbours.
+        """
+        with self._cond:
+            now = time.monotonic()
+            if not self._pending:
+                self._first_event = now
+            self._last_event = now
+            self._pending.add(app_id)
+            self._cond.notify()
+
+    def run(self):
+        """
+        Blocks until stop() is called (or Ctrl+C).
+        """
+        self._known = self.installed_app_ids()
+        flusher = threading.Thread(target=self._flush_loop, name="watch-flush", daemon=True)
+        flusher.start()
+
+        try:
+            if Observer is not None:
+                self._watch_events()
+            else:
+                logger.info("watchdog is not installed; polling library folders instead.")
+                self._watch_polling()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            flusher.join()
+
+    def stop(self):
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify()
+        stop_batch = getattr(self.on_batch, "stop", None)
+        if stop_batch is not None:
+            stop_batch()
+
+    def _manifest_written(self, app_id: str):
+        # Only a manifest we haven't seen before means a new install
+        with self._known_lock:
+            if app_id in self._known:
+                return
+            self._known.add(app_id)
+        self.queue_app(app_id)
+
+    def _manifest_deleted(self, app_id: str):
+        # Uninstalled; a later reinstall counts as new again
+        with self._known_lock:
+            self._known.discard(app_id)
+
+    def _watch_events(self):
+        observer = Observer()
+        handler = _ManifestEventHandler(self._manifest_written, self._manifest_deleted)
+        for steamapps in self.library_paths:
+            observer.schedule(handler, str(steamapps), recursive=False)
+            logger.info(f"Watching {steamapps}")
+        observer.start()
+        try:
+            while not self._stop_event.wait(1):
+                pass
+        finally:
+            observer.stop()
+            observer.join()
+
+    def _watch_polling(self):
+        for steamapps in self.library_paths:
+            logger.info(f"Watching {steamapps} (polling every {self.POLL_INTERVAL}s)")
+        while not self._stop_event.wait(self.POLL_INTERVAL):
+            current = self.installed_app_ids()
+            for app_id in current - self._known:
+                self.queue_app(app_id)
+            self._known = current
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                # Sleep without a timeout while idle
+                while not self._pending and not self._stop_event.is_set():
+                    self._cond.wait()
+                if self._stop_event.is_set():
+                    return
+
+                now = time.monotonic()
+                due = min(self._last_event + self.DEBOUNCE, self._first_event + self.MAX_DELAY)
+                if now < due:
+                    self._cond.wait(due - now)
+                    continue
+
+                batch = sorted(self._pending)
+                self._pending.clear()
+
+            logger.info(f"Detected {len(batch)} newly installed game(s).")
+            try:
+                self.on_batch(batch)
+            except Exception as e:
+                logger.error(f"Watch batch failed: {e}")
+
+
+class DownloadHandler:
+    """
+    on_batch callback for LibraryWatcher: downloads art for a batch of AppIDs and
+    installs it into every user's Steam grid folder.
+    """
+
+    def __init__(self, install_root, pipeline_settings: Optional[dict], grid_paths: List[Path]):
+        self.install_root = install_root
+        self.pipeline_settings = pipeline_settings
+        self.grid_paths = grid_paths
+        self._lock = threading.Lock()
+        self._downloader = None
+        self._stopped = False
+
+    def __call__(self, app_ids: List[str]):
+        from core.batch import BatchDownloader
+
+        with self._lock:
+            if self._stopped:
+                return
+            downloader = BatchDownloader(self.install_root, settings=self.pipeline_settings, on_item=self._on_item)
+            self._downloader = downloader
+        try:
+            success_count = downloader.run(app_ids, total=len(app_ids))
+        finally:
+            with self._lock:
+                self._downloader = None
+        logger.info(f"Batch completed. Successfully downloaded {success_count}/{len(app_ids)} games.")
+
+    def stop(self):
+        """
+        Lets the running batch finish the games in progress and skips the rest.
+        """
+        with self._lock:
+            self._stopped = True
+            downloader = self._downloader
+        if downloader is not None:
+            downloader.stop()
+
+    def _on_item(self, job):
+        from core.steam_paths import SteamPathDetector
+
+        if job.succeeded and self.grid_paths:
+            copied = SteamPathDetector.install_grid_art(job.base_dir, job.app_id, self.grid_paths)
+            logger.info(f"Installed {copied} grid images for '{job.game_name}'.")
+
+
+def make_download_handler(install_root, pipeline_settings: Optional[dict], grid_paths: List[Path]) -> DownloadHandler:
+    """
+    Returns an on_batch callback that downloads art for a batch of AppIDs and
+    installs it into every user's Steam grid folder.
+    """
+    return DownloadHandler(install_root, pipeline_settings, grid_paths)
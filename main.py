@@ -1,17 +1,386 @@
+from core.startup_timer import startup_timer
 import sys
-from PySide6.QtWidgets import QApplication
-from ui.main_window import MainWindow
+import argparse
+import logging
+import multiprocessing
 
-def main():
+
+def run_gui():
     """
-    Application entry point.
+    Launches the desktop application.
     """
-    app = QApplication(sys.argv)
-    
-    window = MainWindow()
+    with startup_timer.measure("import PySide6"):
+        from PySide6.QtWidgets import QApplication
+        from PySide6.QtCore import QTimer
+    with startup_timer.measure("import ui.main_window"):
+        from ui.main_window import MainWindow
+
+    with startup_timer.measure("QApplication()"):
+        app = QApplication(sys.argv)
+
+    with startup_timer.measure("MainWindow()"):
+        window = MainWindow()
     window.show()
-    
+
+    # Fires once the event loop has processed the initial show/paint events
+    def on_interactive():
+        startup_timer.mark("first paint / interactive")
+        startup_timer.report()
+    QTimer.singleShot(0, on_interactive)
+
     sys.exit(app.exec())
 
+
+def run_serve(args):
+    """
+    Runs the local artwork proxy/cache server.
+    """
+    from core.settings import SettingsManager
+    from core.art_server import ArtServer
+
+    install_root = args.install_path or SettingsManager().install_path
+    ArtServer(install_root, host=args.host, port=args.port).run()
+
+
+def run_download(args):
+    """
+    Downloads artwork for AppIDs given on the command line and/or streamed from a file.
+    """
+    import itertools
+    from core.settings import SettingsManager
+    from core.batch import BatchDownloader, iter_app_ids, count_app_ids
+
+    settings = SettingsManager()
+    install_root = args.install_path or settings.install_path
+
+    app_ids = iter(args.app_ids)
+    total = len(args.app_ids)
+    if args.file:
+        app_ids = itertools.chain(app_ids, iter_app_ids(args.file))
+        total += count_app_ids(args.file)
+
+    def on_item(job):
+        if job.error:
+            logging.error(job.error)
+        elif job.succeeded:
+            unchanged = f" ({len(job.unchanged)} unchanged)" if job.unchanged else ""
+            logging.info(f"Downloaded {job.saved} images for '{job.game_name}'{unchanged}.")
+        else:
+            logging.warning(f"Failed to save {job.game_name}.")
+
+    downloader = BatchDownloader(install_root, settings=settings.pipeline, on_item=on_item)
+    success_count = downloader.run(app_ids, total=total)
+    logging.info(f"Batch completed. Successfully downloaded {success_count}/{downloader.processed_count} games.")
+
+
+def run_verify(args):
+    """
+    Checks every downloaded file and optionally re-downloads the broken ones.
+    """
+    from core.settings import SettingsManager
+    from core.integrity import verify_library
+    from core.library import ArtLibrary
+
+    settings = SettingsManager()
+    install_root = args.install_path or settings.install_path
+
+    problems = verify_library(install_root, workers=args.workers, deep=args.deep)
+    for problem in problems:
+        logging.warning(f"{problem.app_id}/{problem.key or '*'}: {problem.reason} {problem.path}")
+    logging.info(f"Verify completed. {len(problems)} problem(s) found.")
+
+    if not args.repair or not problems:
+        return
+
+    # Group broken assets per game so each game is re-queued once with only its broken keys
+    broken = {}
+    for problem in problems:
+        keys = [problem.key] if problem.key else list(ArtLibrary.LOCAL_FILENAMES)
+        broken.setdefault(problem.app_id, set()).update(keys)
+
+    from core.batch import BatchDownloader
+    # Unconditional fetches: a corrupt file can still match its recorded size/mtime and get a 304
+    downloader = BatchDownloader(install_root, settings=settings.pipeline, revalidate=False)
+    repaired = downloader.run((app_id, sorted(keys)) for app_id, keys in broken.items())
+    logging.info(f"Repair completed. Re-downloaded artwork for {repaired}/{len(broken)} games.")
+
+
+def run_mirror(args):
+    """
+    Mirrors artwork for the whole Steam catalog (or an ID file) across sharded worker processes.
+    """
+    from core.settings import SettingsManager
+    from core.mirror import MirrorCoordinator
+    from core.batch import iter_app_ids
+
+    settings = SettingsManager()
+    install_root = args.install_path or settings.install_path
+
+    coordinator = MirrorCoordinator(
+        args.store, install_root,
+        shard_count=args.shards,
+        processes=args.processes,
+        strategy=args.strategy,
+        requests_per_second=args.rps,
+        pipeline_settings=settings.pipeline,
+    )
+    app_ids = list(iter_app_ids(args.file)) if args.file else None
+    if coordinator.prepare(app_ids):
+        coordinator.run()
+
+
+def run_index(args):
+    """
+    Updates the image metadata index and answers gallery queries from it.
+    """
+    from core.settings import SettingsManager
+    from core.image_index import ImageIndex
+
+    install_root = args.install_path or SettingsManager().install_path
+    index = ImageIndex(install_root)
+    try:
+        if not args.no_update:
+            stats = index.update()
+            logging.info(f"Index updated: {stats['read']} read, {stats['unchanged']} unchanged, {stats['removed']} removed.")
+
+        if args.missing:
+            for row in index.missing(args.missing):
+                print(f"{row['app_id']}\t{row['folder']}")
+        elif args.narrower_than:
+            key, width = args.narrower_than
+            for row in index.smaller_than(key, int(width)):
+                print(f"{row['app_id']}\t{row['width']}x{row['height']}\t{row['folder']}")
+        else:
+            for name, count in index.summary().items():
+                print(f"{name}: {count}")
+    except ValueError as e:
+        logging.error(e)
+    finally:
+        index.close()
+
+
+def run_watch(args):
+    """
+    Watches Steam libraries and fetches artwork for newly installed games.
+    """
+    from core.settings import SettingsManager
+    from core.steam_paths import SteamPathDetector
+    from core.watcher import LibraryWatcher, make_download_handler
+
+    settings = SettingsManager()
+    install_root = args.install_path or settings.install_path
+
+    steam_root = SteamPathDetector.get_steam_install_path(args.steam_path or settings.get("steam_path", ""))
+    if steam_root is None:
+        logging.error("Steam installation not found. Use --steam-path to point at it.")
+        return
+
+    libraries = SteamPathDetector.get_library_paths(steam_root)
+    if not libraries:
+        logging.error(f"No Steam libraries found under {steam_root}.")
+        return
+
+    grid_paths = []
+    if not args.no_grid:
+        userdata = SteamPathDetector.get_userdata_path(steam_root)
+        grid_paths = SteamPathDetector.get_grid_paths(userdata) if userdata else []
+
+    watcher = LibraryWatcher(libraries, make_download_handler(install_root, settings.pipeline, grid_paths))
+    if args.initial:
+        for app_id in watcher.installed_app_ids():
+            watcher.queue_app(app_id)
+    watcher.run()
+
+
+def run_bandwidth(args):
+    """
+    Shows or changes the bandwidth limits in settings.json.
+    Running instances pick up the change within a few seconds.
+    """
+    from core.settings import SettingsManager
+
+    settings = SettingsManager()
+    bandwidth = settings.bandwidth
+    if args.rate is not None:
+        bandwidth["bytes_per_sec"] = int(args.rate * 1024)
+    if args.rps is not None:
+        bandwidth["requests_per_sec"] = args.rps
+    if args.full_speed_window is not None:
+        if args.full_speed_window:
+            start, _, end = args.full_speed_window.partition("-")
+            bandwidth["schedule"] = [{"start": start, "end": end, "bytes_per_sec": 0, "requests_per_sec": 0}]
+        else:
+            bandwidth["schedule"] = []
+    if (args.rate, args.rps, args.full_speed_window) != (None, None, None):
+        settings.bandwidth = bandwidth
+
+    print(f"Max rate: {bandwidth['bytes_per_sec'] // 1024 or 'unlimited'} KB/s")
+    print(f"Max requests: {bandwidth['requests_per_sec'] or 'unlimited'}/s")
+    for window in bandwidth.get("schedule", []):
+        print(f"Window {window['start']}-{window['end']}: "
+              f"{window.get('bytes_per_sec', 0) // 1024 or 'unlimited'} KB/s, "
+              f"{window.get('requests_per_sec', 0) or 'unlimited'} req/s")
+
+
+def run_export(args):
+    """
+    Writes a portable cache manifest (and optionally a blob bundle) for seeding other machines.
+    """
+    from core.settings import SettingsManager
+    from core.cache_manifest import export_cache
+
+    install_root = args.install_path or SettingsManager().install_path
+    stats = export_cache(install_root, args.manifest, args.bundle)
+    logging.info(f"Exported {stats['files']} files for {stats['games']} games to {args.manifest}"
+                 + (f" ({stats['blobs']} blobs in {args.bundle})." if args.bundle else "."))
+    if stats["skipped"]:
+        logging.warning(f"Skipped {stats['skipped']} damaged or modified files; run 'verify --repair' first.")
+
+
+def run_import(args):
+    """
+    Seeds the library from a cache manifest, then downloads only what no local source could provide.
+    """
+    from core.settings import SettingsManager
+    from core.cache_manifest import import_cache
+
+    settings = SettingsManager()
+    install_root = args.install_path or settings.install_path
+
+    try:
+        stats, missing = import_cache(install_root, args.manifest, bundle_path=args.bundle,
+                                      source_root=args.source, copy=args.copy)
+    except (OSError, ValueError) as e:
+        logging.error(f"Import failed: {e}")
+        return
+    logging.info(f"Import completed. {stats['present']} already present, {stats['linked']} linked, "
+                 f"{stats['copied']} copied, {stats['unpacked']} unpacked, {stats['missing']} missing.")
+
+    if args.no_fetch or not missing:
+        return
+
+    from core.batch import BatchDownloader
+    downloader = BatchDownloader(install_root, settings=settings.pipeline)
+    fetched = downloader.run(missing, total=len(missing))
+    logging.info(f"Fetched missing artwork for {fetched}/{len(missing)} games.")
+
+
+def configure_bandwidth(args):
+    """
+    Applies the bandwidth limits: command line flags if given, otherwise settings.json
+    (which is then followed for runtime changes).
+    """
+    from core.settings import SettingsManager
+    from core.ratelimit import shaper
+
+    if args.max_rate is None and args.max_rps is None:
+        shaper.configure(SettingsManager().bandwidth)
+        shaper.follow_settings()
+        return
+    shaper.configure({
+        "bytes_per_sec": int((args.max_rate or 0) * 1024),
+        "requests_per_sec": args.max_rps or 0,
+    })
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Steam Art Downloader")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help=f"Report import and window construction times (same as {startup_timer.ENV_VAR}=1)")
+    parser.add_argument("--max-rate", type=float, default=None, metavar="KBPS",
+                        help="Cap download speed in KB/s for this run (default: settings.json)")
+    parser.add_argument("--max-rps", type=float, default=None, metavar="N",
+                        help="Cap requests per second for this run (default: settings.json)")
+    subparsers = parser.add_subparsers(dest="command")
+
+    bandwidth = subparsers.add_parser("bandwidth", help="Show or change the saved bandwidth limits")
+    bandwidth.add_argument("--rate", type=float, default=None, metavar="KBPS", help="Max download speed in KB/s (0 = unlimited)")
+    bandwidth.add_argument("--rps", type=float, default=None, metavar="N", help="Max requests per second (0 = unlimited)")
+    bandwidth.add_argument("--full-speed-window", default=None, metavar="HH:MM-HH:MM",
+                           help="Run unlimited during this daily window, e.g. 22:00-07:00 (empty string clears it)")
+    bandwidth.set_defaults(func=run_bandwidth)
+
+    download = subparsers.add_parser("download", help="Download artwork without opening the GUI")
+    download.add_argument("app_ids", nargs="*", help="Steam AppIDs to download")
+    download.add_argument("--file", help="Text file of AppIDs (whitespace or comma separated), read lazily")
+    download.add_argument("--install-path", default="", help="Download folder (default: install path from settings)")
+    download.set_defaults(func=run_download)
+
+    verify = subparsers.add_parser("verify", help="Check downloaded artwork for truncated or corrupt files")
+    verify.add_argument("--repair", action="store_true", help="Re-download only the broken or missing files")
+    verify.add_argument("--deep", action="store_true", help="Re-hash every file, even if unchanged since download")
+    verify.add_argument("--workers", type=int, default=None, help="Number of scanner processes (default: CPU count)")
+    verify.add_argument("--install-path", default="", help="Download folder (default: install path from settings)")
+    verify.set_defaults(func=run_verify)
+
+    mirror = subparsers.add_parser("mirror", help="Mirror artwork for the whole catalog using sharded worker processes")
+    mirror.add_argument("--store", required=True, help="Job store folder (shared between hosts for multi-machine runs)")
+    mirror.add_argument("--shards", type=int, default=16, help="Number of shards when creating the job store (default: 16)")
+    mirror.add_argument("--processes", type=int, default=4, help="Shards to run at once on this host (default: 4)")
+    mirror.add_argument("--strategy", choices=["hash", "range"], default="hash", help="How AppIDs are split into shards")
+    mirror.add_argument("--rps", type=float, default=None,
+                        help="Requests per second budget per shard (default: an equal part of the bandwidth limit)")
+    mirror.add_argument("--file", help="Mirror the AppIDs in this file instead of the full Steam app list")
+    mirror.add_argument("--install-path", default="", help="Download folder (default: install path from settings)")
+    mirror.set_defaults(func=run_mirror)
+
+    index = subparsers.add_parser("index", help="Index image sizes and query the library (e.g. missing heroes, small logos)")
+    query = index.add_mutually_exclusive_group()
+    query.add_argument("--missing", metavar="KEY", help="List games without this artwork type (e.g. hero, logo)")
+    query.add_argument("--narrower-than", nargs=2, metavar=("KEY", "PX"), help="List artwork of KEY narrower than PX pixels")
+    index.add_argument("--no-update", action="store_true", help="Query the existing index without rescanning")
+    index.add_argument("--install-path", default="", help="Download folder (default: install path from settings)")
+    index.set_defaults(func=run_index)
+
+    watch = subparsers.add_parser("watch", help="Fetch artwork automatically when new games are installed")
+    watch.add_argument("--steam-path", default="", help="Steam installation folder (default: auto-detect)")
+    watch.add_argument("--no-grid", action="store_true", help="Only download; don't install into Steam's grid folders")
+    watch.add_argument("--initial", action="store_true", help="Also process games that are already installed")
+    watch.add_argument("--install-path", default="", help="Download folder (default: install path from settings)")
+    watch.set_defaults(func=run_watch)
+
+    export = subparsers.add_parser("export", help="Write a portable cache manifest for seeding another machine")
+    export.add_argument("--manifest", required=True, help="Manifest file to write (gzip JSON, e.g. cache.json.gz)")
+    export.add_argument("--bundle", default=None, help="Also pack the image files into this zip")
+    export.add_argument("--install-path", default="", help="Download folder (default: install path from settings)")
+    export.set_defaults(func=run_export)
+
+    importer = subparsers.add_parser("import", help="Seed the library from a cache manifest, fetching only the differences")
+    importer.add_argument("--manifest", required=True, help="Manifest written by 'export'")
+    importer.add_argument("--bundle", default=None, help="Zip of image files written by 'export --bundle'")
+    importer.add_argument("--source", default=None, help="Another copy of the library (e.g. a network share) to take files from")
+    importer.add_argument("--copy", action="store_true", help="Copy files from --source instead of hardlinking them")
+    importer.add_argument("--no-fetch", action="store_true", help="Don't download files that no source could provide")
+    importer.add_argument("--install-path", default="", help="Download folder (default: install path from settings)")
+    importer.set_defaults(func=run_import)
+
+    serve = subparsers.add_parser("serve", help="Serve artwork over HTTP for launchers and other local tools")
+    serve.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    serve.add_argument("--install-path", default="", help="Library folder to serve (default: install path from settings)")
+    serve.set_defaults(func=run_serve)
+
+    return parser
+
+
+def main():
+    """
+    Application entry point.
+    Without a sub-command the GUI is started.
+    """
+    # Required for process pools (verify, mirror) in the frozen Windows build
+    multiprocessing.freeze_support()
+
+    args = build_parser().parse_args()
+    if args.profile_startup:
+        startup_timer.enable()
+    configure_bandwidth(args)
+    if args.command is None:
+        run_gui()
+        return
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args.func(args)
+
 if __name__ == "__main__":
     main()
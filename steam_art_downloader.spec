@@ -16,6 +16,48 @@ To build, run:
 
 block_cipher = None
 
+# Qt modules the application never imports. Excluding them keeps their DLLs/.so files
+# (and the plugins that depend on them) out of the bundle, which shortens cold start.
+QT_EXCLUDES = [
+    'PySide6.Qt3DAnimation', 'PySide6.Qt3DCore', 'PySide6.Qt3DExtras', 'PySide6.Qt3DInput',
+    'PySide6.Qt3DLogic', 'PySide6.Qt3DRender', 'PySide6.QtBluetooth', 'PySide6.QtCharts',
+    'PySide6.QtDataVisualization', 'PySide6.QtDesigner', 'PySide6.QtHelp', 'PySide6.QtLocation',
+    'PySide6.QtMultimedia', 'PySide6.QtMultimediaWidgets', 'PySide6.QtNetworkAuth', 'PySide6.QtNfc',
+    'PySide6.QtOpenGL', 'PySide6.QtOpenGLWidgets', 'PySide6.QtPdf', 'PySide6.QtPdfWidgets',
+    'PySide6.QtPositioning', 'PySide6.QtQml', 'PySide6.QtQuick', 'PySide6.QtQuick3D',
+    'PySide6.QtQuickControls2', 'PySide6.QtQuickWidgets', 'PySide6.QtRemoteObjects',
+    'PySide6.QtScxml', 'PySide6.QtSensors', 'PySide6.QtSerialPort', 'PySide6.QtSql',
+    'PySide6.QtSvg', 'PySide6.QtSvgWidgets', 'PySide6.QtTest', 'PySide6.QtTextToSpeech',
+    'PySide6.QtWebChannel', 'PySide6.QtWebEngineCore', 'PySide6.QtWebEngineWidgets',
+    'PySide6.QtWebSockets', 'PySide6.QtXml',
+]
+
+# Stdlib/third-party modules PyInstaller tends to pull in but the app does not use
+PY_EXCLUDES = ['tkinter', 'unittest', 'pydoc', 'test', 'numpy']
+
+# Qt plugin directories that are needed at runtime; every other plugin folder is dropped.
+# 'imageformats' is further limited to the formats we actually decode (Steam art is JPEG/PNG).
+QT_PLUGIN_KEEP = {'platforms', 'styles', 'imageformats'}
+QT_IMAGEFORMAT_KEEP = ('qjpeg', 'libqjpeg')
+
+
+def keep_binary(dest_name):
+    """
+    Returns False for Qt plugins that are not needed at runtime.
+    """
+    parts = dest_name.replace('\\', '/').split('/')
+    if 'plugins' not in parts:
+        return True
+    index = parts.index('plugins')
+    if index + 1 >= len(parts):
+        return True
+    plugin_dir = parts[index + 1]
+    if plugin_dir not in QT_PLUGIN_KEEP:
+        return False
+    if plugin_dir == 'imageformats':
+        return parts[-1].startswith(QT_IMAGEFORMAT_KEEP)
+    return True
+
 a = Analysis(
     ['main.py'],
     pathex=[],
@@ -25,13 +67,17 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=QT_EXCLUDES + PY_EXCLUDES,
     win_no_prefer_redirects=False,
     win_private_assemblies=False,
     cipher=block_cipher,
     noarchive=False,
 )
 
+# Drop unused Qt plugins (translations are not used either)
+a.binaries = [b for b in a.binaries if keep_binary(b[0])]
+a.datas = [d for d in a.datas if '/translations/' not in d[0].replace('\\', '/')]
+
 # Create the Python Bytecode Archive
 pyz = PYZ(a.pure, a.zipped_data, cipher=block_cipher)
 
@@ -45,7 +91,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,           # Compress using UPX if available
+    upx=False,          # UPX-packed binaries must be decompressed on every launch, slowing cold start
     console=False,      # False = Windowed application (no terminal popup)
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -56,14 +102,14 @@ exe = EXE(
 )
 
 # Collect all files into a directory (One-Folder Mode)
-# This is generally faster to startup than One-File mode.
+# This is faster to start than One-File mode, which unpacks everything to a temp dir on each launch.
 coll = COLLECT(
     exe,
     a.binaries,
     a.zipfiles,
     a.datas,
     strip=False,
-    upx=True,
+    upx=False,
     upx_exclude=[],
     name='SteamArtDownloader',
 )
@@ -0,0 +1,253 @@
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Optional
+
+# cProfile, pstats and tracemalloc are imported by BatchProfiler when profiling starts
+
+from PySide6.QtCore import QObject, QTimer
+
+logger = logging.getLogger(__name__)
+
+# Frames from files under this folder are "ours" when naming the handler behind a stall
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Profiles and snapshots are written next to the log file
+LOG_FILE = Path("downloader.log")
+
+STALL_ENV_VAR = "SAD_STALL_MS"
+PROFILE_ENV_VAR = "SAD_PROFILE_BATCH"
+
+
+def describe_stack(frame) -> str:
+    """
+    Summarizes a stack as the chain of project functions on it, outermost first.
+    The outermost one is normally the slot or handler Qt invoked.
+    """
+    ours = []
+    for summary in traceback.extract_stack(frame):
+        try:
+            path = Path(summary.filename).resolve()
+        except OSError:
+            continue
+        if PROJECT_ROOT in path.parents and "site-packages" not in path.parts:
+            rel = path.relative_to(PROJECT_ROOT).as_posix()
+            ours.append(f"{summary.name} ({rel}:{summary.lineno})")
+    if not ours:
+        # Stalled inside Qt/C++ code with no Python frame of ours on the stack
+        innermost = traceback.extract_stack(frame)[-1:]
+        return " -> ".join(f"{s.name} ({s.filename}:{s.lineno})" for s in innermost) or "unknown"
+    return " -> ".join(ours[:6])
+
+
+class EventLoopWatchdog(QObject):
+    """
+    Measures Qt event-loop latency and logs every stall longer than the threshold,
+    together with the slot/handler that was running on the GUI thread.
+
+    A QTimer on the GUI thread records heartbeats. A background thread notices a
+    missing heartbeat while the stall is still happening and captures the GUI
+    thread's stack, so the culprit can be named even though the GUI thread itself
+    is blocked.
+    """
+    HEARTBEAT_MS = 100
+
+    def __init__(self, threshold_ms: int = 250, parent=None):
+        super().__init__(parent)
+        self.threshold = max(threshold_ms, self.HEARTBEAT_MS) / 1000.0
+        self.max_latency = 0.0
+        self._gui_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._culprit: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.HEARTBEAT_MS)
+        self._timer.timeout.connect(self._beat)
+        self._monitor = threading.Thread(target=self._monitor_loop, name="ui-watchdog", daemon=True)
+
+    def start(self):
+        self._last_beat = time.monotonic()
+        self._timer.start()
+        self._monitor.start()
+        logger.info(f"UI watchdog active (stall threshold {self.threshold * 1000:.0f} ms).")
+
+    def stop(self):
+        self._timer.stop()
+        self._stop_event.set()
+
+    def _beat(self):
+        now = time.monotonic()
+        with self._lock:
+            latency = now - self._last_beat - self.HEARTBEAT_MS / 1000.0
+            self._last_beat = now
+            culprit = self._culprit
+            self._culprit = None
+
+        self.max_latency = max(self.max_latency, latency)
+        if latency >= self.threshold:
+            logger.warning(f"UI stalled for {latency * 1000:.0f} ms in {culprit or 'unknown handler'}")
+
+    def _monitor_loop(self):
+        interval = self.threshold / 2
+        while not self._stop_event.wait(interval):
+            with self._lock:
+                overdue = time.monotonic() - self._last_beat - self.HEARTBEAT_MS / 1000.0
+                if overdue < self.threshold or self._culprit is not None:
+                    continue
+            # Capture what the blocked GUI thread is doing right now
+            frame = sys._current_frames().get(self._gui_thread_id)
+            culprit = describe_stack(frame) if frame is not None else "unknown"
+            with self._lock:
+                self._culprit = culprit
+
+
+class ThreadSampler:
+    """
+    Statistical profiler for every thread (the GUI, the download worker, pipeline
+    stages and name resolvers). Stacks are sampled with sys._current_frames(), so
+    it runs alongside cProfile, which only sees the thread that enabled it and, on
+    Python 3.12+, cannot have a second instance active for other threads.
+
+    Samples are wall-clock: time a thread spends blocked on the network or on a
+    full queue shows up too, which is what makes pipeline bottlenecks visible.
+    """
+    INTERVAL = 0.005
+    TOP_FUNCTIONS = 25
+
+    # "pipeline-fetch-3" and "name-resolve_0" are reported per role, not per thread
+    THREAD_NUMBER = re.compile(r"[-_]\d+$")
+
+    def __init__(self):
+        self._samples = Counter()
+        self._own = defaultdict(Counter)
+        self._cumulative = defaultdict(Counter)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="batch-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        gui_ident = threading.main_thread().ident
+        while not self._stop_event.wait(self.INTERVAL):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if ident == gui_ident:
+                    role = "GUI thread"
+                else:
+                    role = self.THREAD_NUMBER.sub("", names.get(ident, "worker (QThread)"))
+                self._record(role, frame)
+
+    def _record(self, role: str, frame):
+        self._samples[role] += 1
+        seen = set()
+        leaf = True
+        while frame is not None:
+            code = frame.f_code
+            func = (code.co_filename, code.co_firstlineno, code.co_name)
+            if leaf:
+                self._own[role][func] += 1
+                leaf = False
+            if func not in seen:
+                # Recursive calls count once per sample
+                seen.add(func)
+                self._cumulative[role][func] += 1
+            frame = frame.f_back
+
+    def write(self, path: Path):
+        with open(path, "w") as f:
+            f.write(f"Wall-clock stack samples every {self.INTERVAL * 1000:.0f} ms, per thread role.\n")
+            f.write("cumul% = share of samples with the function on the stack, own% = at the top.\n")
+            for role, total in self._samples.most_common():
+                f.write(f"\n== {role} ({total} samples) ==\n")
+                f.write(f"{'cumul%':>7} {'own%':>6}  function\n")
+                for func, count in self._cumulative[role].most_common(self.TOP_FUNCTIONS):
+                    filename, lineno, name = func
+                    own = self._own[role][func]
+                    f.write(f"{100 * count / total:7.1f} {100 * own / total:6.1f}  "
+                            f"{name} ({os.path.basename(filename)}:{lineno})\n")
+
+
+class BatchProfiler:
+    """
+    Profiles one batch and writes the reports next to downloader.log:
+    profile-<ts>.prof (cProfile of the GUI thread, load with pstats/snakeviz),
+    profile-<ts>.txt (its top functions), threads-<ts>.txt (sampled stacks of the
+    worker, pipeline and resolver threads that do the batch's work) and
+    memory-<ts>.txt (allocation growth during the batch).
+    """
+    TOP_FUNCTIONS = 40
+    TOP_ALLOCATIONS = 30
+
+    def __init__(self):
+        import cProfile
+        self._profile = cProfile.Profile()
+        self._sampler = ThreadSampler()
+        self._snapshot = None
+        self._started_tracing = False
+        self._stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    @staticmethod
+    def enabled(settings_value: bool = False) -> bool:
+        return settings_value or os.environ.get(PROFILE_ENV_VAR, "") not in ("", "0")
+
+    def start(self):
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self._started_tracing = True
+        self._snapshot = tracemalloc.take_snapshot()
+        self._sampler.start()
+        self._profile.enable()
+
+    def stop(self) -> Path:
+        """
+        Stops profiling and writes the reports. Returns the output folder.
+        """
+        import io
+        import pstats
+        import tracemalloc
+
+        self._profile.disable()
+        self._sampler.stop()
+        out_dir = LOG_FILE.resolve().parent
+        base = out_dir / f"profile-{self._stamp}"
+
+        try:
+            self._profile.dump_stats(f"{base}.prof")
+            text = io.StringIO()
+            stats = pstats.Stats(self._profile, stream=text)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.TOP_FUNCTIONS)
+            with open(f"{base}.txt", "w") as f:
+                f.write(text.getvalue())
+            self._sampler.write(out_dir / f"threads-{self._stamp}.txt")
+
+            snapshot = tracemalloc.take_snapshot()
+            with open(out_dir / f"memory-{self._stamp}.txt", "w") as f:
+                current, peak = tracemalloc.get_traced_memory()
+                f.write(f"Traced memory: current {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB\n\n")
+                for stat in snapshot.compare_to(self._snapshot, "lineno")[:self.TOP_ALLOCATIONS]:
+                    f.write(f"{stat}\n")
+            logger.info(f"Batch profile written to {base}.prof/.txt, threads-{self._stamp}.txt "
+                        f"and memory-{self._stamp}.txt")
+        except OSError as e:
+            logger.error(f"Failed to write batch profile: {e}")
+        finally:
+            if self._started_tracing:
+                tracemalloc.stop()
+        return out_dir
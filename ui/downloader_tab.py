@@ -1,13 +1,17 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
-                               QLabel, QLineEdit, QPushButton, QScrollArea, QGridLayout, QProgressBar)
+                               QLabel, QLineEdit, QPushButton, QScrollArea, QGridLayout, QProgressBar,
+                               QFileDialog)
 from PySide6.QtCore import Qt, QThread, Signal, QUrl
 from PySide6.QtGui import QPixmap, QDesktopServices
 from pathlib import Path
+from typing import Optional
+import logging
 import os
+import threading
 
 from core.settings import SettingsManager
-from core.steamdb import SteamDBFetcher
 
+# core.batch (and with it core.steamdb / requests) is imported on first use to keep startup fast
 
 
 class DownloadWorker(QThread):
@@ -15,96 +19,91 @@ class DownloadWorker(QThread):
     progress = Signal(int, int) # current, total
     finished_batch = Signal(str) # overall message
 
-    def __init__(self, app_ids: list, parent=None):
+    # Preview images are only sent for the first games of a batch. Signals queue up
+    # without limit, so huge batches must not push image bytes at the GUI.
+    MAX_PREVIEW_GAMES = 50
+
+    def __init__(self, app_ids, total: Optional[int] = None, parent=None):
+        """
+        app_ids may be any iterable (e.g. a generator over a large ID file);
+        it is consumed lazily. Pass `total` when the length is known up front.
+        """
         super().__init__(parent)
         self.app_ids = app_ids
+        self.total = total if total is not None else (len(app_ids) if hasattr(app_ids, "__len__") else None)
         self.last_path = ""
+        self.downloader = None
+        self.previews_sent = 0
+        self._preview_lock = threading.Lock()
 
     def run(self):
-        # Calculate total steps: games * artwork_types
-        artwork_keys = list(SteamDBFetcher.URL_TEMPLATES.keys())
-        total_steps = len(self.app_ids) * len(artwork_keys)
-        self.current_step = 0
-        success_count = 0
-        
-        # Get install path from settings
-        settings = SettingsManager()
-        install_root = Path(settings.install_path)
-        
-        for app_id in self.app_ids:
-            if self._process_game(app_id, install_root, artwork_keys, total_steps):
-                success_count += 1
+        from core.batch import BatchDownloader
 
-        # Final progress update
-        self.progress.emit(total_steps, total_steps)
-        self.finished_batch.emit(f"Batch completed. Successfully downloaded {success_count}/{len(self.app_ids)} games.")
-
-    def _process_game(self, app_id, install_root, artwork_keys, total_steps) -> bool:
-        # 1. Fetch Game Name
-        game_name = SteamDBFetcher.get_game_name(app_id)
-        
-        # Sanitize folder name
-        safe_name = "".join([c for c in game_name if c.isalnum() or c in (' ', '-', '_')]).strip()
-        folder_name = f"{safe_name} ({app_id})"
-        
-        # Create base directory
-        base_dir = install_root / folder_name
+        # Get install path and per-stage concurrency from settings
+        settings = SettingsManager()
+        self.downloader = BatchDownloader(
+            settings.install_path,
+            settings=settings.pipeline,
+            on_item=self._on_item,
+            on_progress=self.progress.emit,
+        )
         try:
-            base_dir.mkdir(parents=True, exist_ok=True)
-        except OSError as e:
-            self.item_finished.emit({}, f"Error creating folder for {app_id}: {e}", "")
-            self.current_step += len(artwork_keys)
-            self.progress.emit(self.current_step, total_steps)
-            return False
-
-        # 2. Fetch and Save Images Loop
-        results, local_saved = self._fetch_and_save_images(app_id, base_dir, artwork_keys, total_steps)
-
-        # Check success for this game
-        if local_saved > 0:
-            msg = f"Downloaded {local_saved} images for '{game_name}'."
-            self.last_path = str(base_dir.resolve())
-            self.item_finished.emit(results, msg, self.last_path)
-            return True
+            success_count = self.downloader.run(self.app_ids, total=self.total)
+        except Exception as e:
+            # e.g. the ID file became unreadable mid-batch
+            logging.error(f"Batch failed: {e}")
+            self.finished_batch.emit(f"Batch failed after {self.downloader.processed_count} games: {e}")
+            return
+        processed = self.downloader.processed_count
+
+        self.finished_batch.emit(f"Batch completed. Successfully downloaded {success_count}/{processed} games.")
+
+    def stop(self):
+        if self.downloader:
+            self.downloader.stop()
+
+    def _on_item(self, job):
+        # Runs on the pipeline's publish stage
+        if job.error:
+            self.item_finished.emit({}, job.error, "")
+        elif job.succeeded:
+            unchanged = f" ({len(job.unchanged)} unchanged)" if job.unchanged else ""
+            msg = f"Downloaded {job.saved} images for '{job.game_name}'{unchanged}."
+            self.last_path = str(job.base_dir.resolve())
+            images = self._preview_images(job) if self._take_preview_slot() else {}
+            self.item_finished.emit(images, msg, self.last_path)
         else:
-            self.item_finished.emit({}, f"Failed to save {game_name}.", "")
-            return False
+            self.item_finished.emit({}, f"Failed to save {job.game_name}.", "")
 
-    def _fetch_and_save_images(self, app_id, base_dir, artwork_keys, total_steps):
-        results = {} 
-        local_saved = 0
-        
-        local_mapping = {
-            "header": "header.jpg",
-            "library_600x900_2x": "library_600x900_2x.jpg",
-            "library_hero_2x": "library_hero_2x.jpg",
-            "logo": "logo.png",
-            "capsule_231x87": "capsule_231x87.jpg"
-        }
-        
-        for key in artwork_keys:
-            # Fetch
-            img_data = SteamDBFetcher.fetch_image(app_id, key)
-            results[key] = img_data
-            
-            # Save if successful
-            if img_data and key in local_mapping:
-                target = base_dir / local_mapping[key]
-                if SteamDBFetcher.save_image(img_data, str(target)):
-                    local_saved += 1
-            
-            # Update Progress
-            self.current_step += 1
-            self.progress.emit(self.current_step, total_steps)
-            
-        return results, local_saved
-
-from ui.search_dialog import SearchDialog
+    def _take_preview_slot(self) -> bool:
+        with self._preview_lock:
+            if self.previews_sent >= self.MAX_PREVIEW_GAMES:
+                return False
+            self.previews_sent += 1
+            return True
+
+    @staticmethod
+    def _preview_images(job) -> dict:
+        """
+        Image bytes to preview. Files confirmed unchanged (304) were never downloaded,
+        so they are read back from disk here.
+        """
+        from core.library import ArtLibrary
+
+        images = dict(job.results)
+        for key in job.unchanged:
+            try:
+                images[key] = (job.base_dir / ArtLibrary.LOCAL_FILENAMES[key]).read_bytes()
+            except OSError:
+                pass
+        return images
 
 class DownloaderTab(QWidget):
     def __init__(self):
         super().__init__()
         self.last_saved_path = ""
+        self.profiler = None
+        self.worker = None
         self.init_ui()
 
     def init_ui(self):
@@ -119,6 +118,15 @@ class DownloaderTab(QWidget):
         self.fetch_btn = QPushButton("Fetch & Install")
         self.fetch_btn.clicked.connect(self.start_download)
         input_layout.addWidget(self.fetch_btn)
+
+        self.file_btn = QPushButton("From ID File...")
+        self.file_btn.clicked.connect(self.start_download_from_file)
+        input_layout.addWidget(self.file_btn)
+
+        self.stop_btn = QPushButton("Stop")
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop_download)
+        input_layout.addWidget(self.stop_btn)
         
         layout.addLayout(input_layout)
 
@@ -210,6 +218,7 @@ class DownloaderTab(QWidget):
                 target_ids = [user_input]
             else:
                 # Search mode
+                from ui.search_dialog import SearchDialog
                 dialog = SearchDialog(user_input, self)
                 if dialog.exec():
                     target_ids = [dialog.selected_appid]
@@ -217,7 +226,35 @@ class DownloaderTab(QWidget):
                 else:
                     return
 
+        self.start_batch(target_ids, len(target_ids))
+
+    def start_download_from_file(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, "Select AppID List", "", "Text Files (*.txt *.csv);;All Files (*)")
+        if not file_path:
+            return
+
+        from core.batch import iter_app_ids, count_app_ids
+
+        try:
+            total = count_app_ids(file_path)
+        except OSError as e:
+            self.status_label.setText(f"Could not read {file_path}: {e}")
+            return
+
+        # IDs are streamed from the file by the worker, never loaded all at once
+        self.start_batch(iter_app_ids(file_path), total)
+
+    def start_batch(self, app_ids, total):
+        # Optional profile/tracemalloc capture of this batch (settings or SAD_PROFILE_BATCH=1)
+        from ui.diagnostics import BatchProfiler
+        self.profiler = None
+        if BatchProfiler.enabled(SettingsManager().diagnostics["profile_batches"]):
+            self.profiler = BatchProfiler()
+            self.profiler.start()
+
         self.fetch_btn.setEnabled(False)
+        self.file_btn.setEnabled(False)
+        self.stop_btn.setEnabled(True)
         self.status_label.setText("Starting download...")
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
@@ -228,19 +265,30 @@ class DownloaderTab(QWidget):
         self.grid_row = 0
         self.grid_col = 0
         
-        self.worker = DownloadWorker(target_ids)
+        self.worker = DownloadWorker(app_ids, total)
         self.worker.item_finished.connect(self.on_item_finished)
         self.worker.progress.connect(self.on_progress)
         self.worker.finished_batch.connect(self.on_batch_finished)
         self.worker.start()
 
+    def stop_download(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.stop()
+            self.stop_btn.setEnabled(False)
+            self.status_label.setText("Stopping after the games in progress...")
+
     def on_progress(self, current, total):
         self.progress_bar.setMaximum(total)
         self.progress_bar.setValue(current)
 
     def on_batch_finished(self, message):
         self.fetch_btn.setEnabled(True)
+        self.file_btn.setEnabled(True)
+        self.stop_btn.setEnabled(False)
         self.status_label.setText(message)
+        if self.profiler:
+            self.profiler.stop()
+            self.profiler = None
         # self.progress_bar.setVisible(False) # Keep visible to show completion
 
     def on_item_finished(self, results, message, saved_path):
@@ -248,6 +296,10 @@ class DownloaderTab(QWidget):
         if saved_path:
             self.last_saved_path = saved_path
 
+        # The worker stops sending images after DownloadWorker.MAX_PREVIEW_GAMES games
+        if not results:
+            return
+
         # Display previews
         for key, data in results.items():
             if data:
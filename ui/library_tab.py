@@ -0,0 +1,147 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
+                               QSpinBox, QPushButton, QListWidget, QListWidgetItem)
+from PySide6.QtCore import Qt, QThread, Signal, QUrl
+from PySide6.QtGui import QDesktopServices
+from pathlib import Path
+
+from core.settings import SettingsManager
+from core.library import ArtLibrary
+from core.image_index import ImageIndex
+
+
+class IndexWorker(QThread):
+    index_updated = Signal(dict) # update stats, or {"error": message}
+
+    def __init__(self, install_root):
+        super().__init__()
+        self.install_root = install_root
+
+    def run(self):
+        try:
+            # SQLite connections can't cross threads, so the worker opens its own
+            index = ImageIndex(self.install_root)
+            try:
+                stats = index.update()
+            finally:
+                index.close()
+        except Exception as e:
+            self.index_updated.emit({"error": str(e)})
+            return
+        self.index_updated.emit(stats)
+
+
+class LibraryTab(QWidget):
+    """
+    Queries the image metadata index, e.g. games with no hero or logos under 400px.
+    """
+    QUERY_MISSING = "Missing artwork"
+    QUERY_NARROW = "Narrower than"
+
+    def __init__(self):
+        super().__init__()
+        self.install_root = SettingsManager().install_path
+        self.index = None
+        self.worker = None
+        self.init_ui()
+        self.refresh_index()
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+
+        # Query controls
+        query_layout = QHBoxLayout()
+        self.query_combo = QComboBox()
+        self.query_combo.addItems([self.QUERY_MISSING, self.QUERY_NARROW])
+        self.query_combo.currentTextChanged.connect(self.on_query_changed)
+        query_layout.addWidget(self.query_combo)
+
+        self.key_combo = QComboBox()
+        self.key_combo.addItems(list(ArtLibrary.LOCAL_FILENAMES.keys()))
+        query_layout.addWidget(self.key_combo)
+
+        self.width_spin = QSpinBox()
+        self.width_spin.setRange(1, 10000)
+        self.width_spin.setValue(400)
+        self.width_spin.setSuffix(" px")
+        self.width_spin.setEnabled(False)
+        query_layout.addWidget(self.width_spin)
+
+        self.search_btn = QPushButton("Search")
+        self.search_btn.clicked.connect(self.run_query)
+        query_layout.addWidget(self.search_btn)
+
+        self.refresh_btn = QPushButton("Rescan Library")
+        self.refresh_btn.clicked.connect(self.refresh_index)
+        query_layout.addWidget(self.refresh_btn)
+
+        layout.addLayout(query_layout)
+
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+
+        # Results (double-click opens the game folder)
+        self.results_list = QListWidget()
+        self.results_list.itemDoubleClicked.connect(self.open_folder)
+        layout.addWidget(self.results_list)
+
+    def on_query_changed(self, text):
+        self.width_spin.setEnabled(text == self.QUERY_NARROW)
+
+    def refresh_index(self):
+        self.refresh_btn.setEnabled(False)
+        self.search_btn.setEnabled(False)
+        self.status_label.setText("Scanning library...")
+
+        # The download folder may have been changed in the Settings tab since the last scan
+        install_root = SettingsManager().install_path
+        if install_root != self.install_root:
+            if self.index is not None:
+                self.index.close()
+                self.index = None
+            self.install_root = install_root
+            self.results_list.clear()
+
+        self.worker = IndexWorker(self.install_root)
+        self.worker.index_updated.connect(self.on_index_updated)
+        self.worker.start()
+
+    def on_index_updated(self, stats):
+        self.refresh_btn.setEnabled(True)
+        self.search_btn.setEnabled(True)
+        if "error" in stats:
+            self.status_label.setText(f"Library scan failed: {stats['error']}")
+            return
+        try:
+            if self.index is None:
+                self.index = ImageIndex(self.install_root)
+            summary = self.index.summary()
+        except Exception as e:
+            self.status_label.setText(f"Cannot open the library index: {e}")
+            return
+        self.status_label.setText(
+            f"{summary['games']} games indexed ({stats['read']} files read, {stats['unchanged']} unchanged)."
+        )
+
+    def run_query(self):
+        if self.index is None:
+            return
+
+        key = self.key_combo.currentText()
+        self.results_list.clear()
+        if self.query_combo.currentText() == self.QUERY_MISSING:
+            rows = self.index.missing(key)
+            texts = [row["folder"] for row in rows]
+        else:
+            rows = self.index.smaller_than(key, self.width_spin.value())
+            texts = [f"{row['folder']} - {row['width']}x{row['height']}" for row in rows]
+
+        for row, text in zip(rows, texts):
+            item = QListWidgetItem(text)
+            item.setData(Qt.UserRole, row["folder"])
+            self.results_list.addItem(item)
+        self.status_label.setText(f"{len(rows)} result(s).")
+
+    def open_folder(self, item):
+        path = Path(self.install_root).resolve() / item.data(Qt.UserRole)
+        if path.exists():
+            QDesktopServices.openUrl(QUrl.fromLocalFile(str(path)))
@@ -1,38 +1,48 @@
 
 from PySide6.QtWidgets import QMainWindow, QTabWidget, QVBoxLayout, QWidget, QMenuBar
 from PySide6.QtGui import QAction
+from collections import deque
 import logging
+import os
 
+from core.startup_timer import startup_timer
 from ui.downloader_tab import DownloaderTab
-from ui.settings_tab import SettingsTab
-from ui.log_window import LogWindow, QtLogHandler
+from ui.log_window import QtLogHandler
+from ui.diagnostics import EventLoopWatchdog, STALL_ENV_VAR
+from core.settings import SettingsManager
 
 class MainWindow(QMainWindow):
+    # Log lines kept for the log window until it is opened for the first time
+    LOG_BUFFER_SIZE = 2000
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Steam Art Downloader v0.8")
         self.resize(800, 700)
-        
-        # Setup Logging
-        self.setup_logging()
 
+        # Setup Logging
+        with startup_timer.measure("MainWindow.setup_logging"):
+            self.setup_logging()
+        self.setup_watchdog()
 
 
         self.init_ui()
 
     def setup_logging(self):
-        self.log_window = LogWindow(self)
-        
+        # The LogWindow itself is created on first use; until then messages are buffered
+        self.log_window = None
+        self.log_buffer = deque(maxlen=self.LOG_BUFFER_SIZE)
+
         # Create handler
         handler = QtLogHandler()
         handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-        handler.log_signal.connect(self.log_window.append_log)
-        
+        handler.log_signal.connect(self.append_log)
+
         # Configure root logger
         root_logger = logging.getLogger()
         root_logger.addHandler(handler)
         root_logger.setLevel(logging.INFO)
-        
+
         # File Handler
         try:
             file_handler = logging.FileHandler("downloader.log")
@@ -42,7 +52,34 @@ class MainWindow(QMainWindow):
             # Fallback if we can't write to file (e.g. permissions)
             print(f"Failed to setup file logging: {e}")
 
+    def setup_watchdog(self):
+        threshold = SettingsManager().diagnostics["stall_threshold_ms"]
+        override = os.environ.get(STALL_ENV_VAR)
+        if override is not None:
+            try:
+                threshold = int(override)
+            except ValueError:
+                logging.warning(f"Ignoring {STALL_ENV_VAR}={override!r} (expected milliseconds, 0 to disable); "
+                                f"using the configured {threshold} ms.")
+        self.watchdog = None
+        if threshold > 0:
+            self.watchdog = EventLoopWatchdog(threshold, self)
+            self.watchdog.start()
+
+    def append_log(self, message: str):
+        if self.log_window is None:
+            self.log_buffer.append(message)
+        else:
+            self.log_window.append_log(message)
+
     def show_log_window(self):
+        if self.log_window is None:
+            from ui.log_window import LogWindow
+            self.log_window = LogWindow(self)
+            for message in self.log_buffer:
+                self.log_window.append_log(message)
+            self.log_buffer.clear()
+
         self.log_window.show()
         self.log_window.raise_()
         self.log_window.activateWindow()
@@ -54,14 +91,50 @@ class MainWindow(QMainWindow):
         layout = QVBoxLayout(central_widget)
 
         self.tabs = QTabWidget()
-        self.downloader_tab = DownloaderTab()
-        self.settings_tab = SettingsTab()
-        
-        # Connect settings "Show logs" button
-        self.settings_tab.show_logs_requested.connect(self.show_log_window)
+        with startup_timer.measure("DownloaderTab()"):
+            self.downloader_tab = DownloaderTab()
+        self.settings_tab = None
 
         self.tabs.addTab(self.downloader_tab, "Downloader")
-        self.tabs.addTab(self.settings_tab, "Settings")
+
+        # Tabs other than the first are built the first time they are shown
+        self._lazy_tabs = {}
+        self.add_lazy_tab("Library", self.create_library_tab)
+        self.add_lazy_tab("Settings", self.create_settings_tab)
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         layout.addWidget(self.tabs)
 
+    def add_lazy_tab(self, title: str, factory):
+        placeholder = QWidget()
+        QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+        index = self.tabs.addTab(placeholder, title)
+        self._lazy_tabs[index] = factory
+
+    def on_tab_changed(self, index: int):
+        factory = self._lazy_tabs.pop(index, None)
+        if factory is None:
+            return
+        with startup_timer.measure(f"{self.tabs.tabText(index)} tab (lazy)"):
+            self.tabs.widget(index).layout().addWidget(factory())
+
+    def closeEvent(self, event):
+        # Let a running batch drain its in-flight games instead of being torn down mid-write
+        worker = self.downloader_tab.worker
+        if worker is not None and worker.isRunning():
+            worker.stop()
+            worker.wait()
+        super().closeEvent(event)
+
+    def create_library_tab(self):
+        from ui.library_tab import LibraryTab
+        return LibraryTab()
+
+    def create_settings_tab(self):
+        from ui.settings_tab import SettingsTab
+        self.settings_tab = SettingsTab()
+
+        # Connect settings "Show logs" button
+        self.settings_tab.show_logs_requested.connect(self.show_log_window)
+        return self.settings_tab
+
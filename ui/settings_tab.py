@@ -1,9 +1,11 @@
 
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
-                               QLineEdit, QPushButton, QFileDialog, QCheckBox, QMessageBox, QGroupBox)
-from PySide6.QtCore import Signal
+                               QLineEdit, QPushButton, QFileDialog, QCheckBox, QMessageBox, QGroupBox,
+                               QSpinBox, QDoubleSpinBox, QTimeEdit)
+from PySide6.QtCore import Signal, QTime
 from core.settings import SettingsManager
 from core.steam_paths import SteamPathDetector
+from core.ratelimit import shaper
 import os
 
 class SettingsTab(QWidget):
@@ -54,6 +56,12 @@ class SettingsTab(QWidget):
         # Hidden for now as logic in main doesn't fully support toggling types yet
         # layout.addWidget(types_group) 
 
+        # Bandwidth Limits
+        layout.addWidget(self.create_bandwidth_group())
+
+        # Diagnostics
+        layout.addWidget(self.create_diagnostics_group())
+
         # Save Button
         save_btn = QPushButton("Save Settings")
         save_btn.clicked.connect(self.save_settings)
@@ -66,6 +74,69 @@ class SettingsTab(QWidget):
         
         layout.addStretch()
 
+    def create_bandwidth_group(self):
+        bandwidth = self.settings.bandwidth
+        group = QGroupBox("Bandwidth Limits (0 = unlimited)")
+        group_layout = QVBoxLayout()
+
+        rate_layout = QHBoxLayout()
+        rate_layout.addWidget(QLabel("Max download speed:"))
+        self.rate_spin = QSpinBox()
+        self.rate_spin.setRange(0, 1000000)
+        self.rate_spin.setSuffix(" KB/s")
+        self.rate_spin.setValue(int(bandwidth.get("bytes_per_sec", 0)) // 1024)
+        rate_layout.addWidget(self.rate_spin)
+
+        rate_layout.addWidget(QLabel("Max requests:"))
+        self.rps_spin = QDoubleSpinBox()
+        self.rps_spin.setRange(0, 1000)
+        self.rps_spin.setSuffix(" /s")
+        self.rps_spin.setValue(float(bandwidth.get("requests_per_sec", 0)))
+        rate_layout.addWidget(self.rps_spin)
+        group_layout.addLayout(rate_layout)
+
+        # Single "full speed" window (e.g. at night); more windows can be added in settings.json
+        schedule = bandwidth.get("schedule", [])
+        window = schedule[0] if schedule else {"start": "22:00", "end": "07:00"}
+        window_layout = QHBoxLayout()
+        self.window_check = QCheckBox("Full speed between")
+        self.window_check.setChecked(bool(schedule))
+        window_layout.addWidget(self.window_check)
+        self.window_start = QTimeEdit(QTime.fromString(window["start"], "HH:mm"))
+        self.window_start.setDisplayFormat("HH:mm")
+        window_layout.addWidget(self.window_start)
+        window_layout.addWidget(QLabel("and"))
+        self.window_end = QTimeEdit(QTime.fromString(window["end"], "HH:mm"))
+        self.window_end.setDisplayFormat("HH:mm")
+        window_layout.addWidget(self.window_end)
+        window_layout.addStretch()
+        group_layout.addLayout(window_layout)
+
+        group.setLayout(group_layout)
+        return group
+
+    def create_diagnostics_group(self):
+        diagnostics = self.settings.diagnostics
+        group = QGroupBox("Diagnostics")
+        group_layout = QVBoxLayout()
+
+        stall_layout = QHBoxLayout()
+        stall_layout.addWidget(QLabel("Log UI stalls longer than (0 = off, applies on restart):"))
+        self.stall_spin = QSpinBox()
+        self.stall_spin.setRange(0, 10000)
+        self.stall_spin.setSuffix(" ms")
+        self.stall_spin.setValue(int(diagnostics["stall_threshold_ms"]))
+        stall_layout.addWidget(self.stall_spin)
+        stall_layout.addStretch()
+        group_layout.addLayout(stall_layout)
+
+        self.profile_check = QCheckBox("Profile batches (cProfile + tracemalloc, saved next to downloader.log)")
+        self.profile_check.setChecked(bool(diagnostics["profile_batches"]))
+        group_layout.addWidget(self.profile_check)
+
+        group.setLayout(group_layout)
+        return group
+
     def browse_path(self):
         directory = QFileDialog.getExistingDirectory(self, "Select Install Directory")
         if directory:
@@ -80,7 +151,28 @@ class SettingsTab(QWidget):
              pass
         
         self.settings.install_path = path or "art-downloads"
-        self.settings.save_settings()
+
+        bandwidth = self.settings.bandwidth
+        bandwidth["bytes_per_sec"] = self.rate_spin.value() * 1024
+        bandwidth["requests_per_sec"] = self.rps_spin.value()
+        # Only the first window is edited here; further windows from settings.json are kept
+        schedule = list(bandwidth.get("schedule", []))
+        if self.window_check.isChecked():
+            window = dict(schedule[0]) if schedule else {"bytes_per_sec": 0, "requests_per_sec": 0}
+            window["start"] = self.window_start.time().toString("HH:mm")
+            window["end"] = self.window_end.time().toString("HH:mm")
+            bandwidth["schedule"] = [window] + schedule[1:]
+        else:
+            bandwidth["schedule"] = schedule[1:]
+        self.settings.bandwidth = bandwidth
+
+        self.settings.diagnostics = {
+            "stall_threshold_ms": self.stall_spin.value(),
+            "profile_batches": self.profile_check.isChecked(),
+        }
+
+        # Applies to downloads already running as well
+        shaper.configure(bandwidth)
         
         QMessageBox.information(self, "Settings Saved", "Settings updated successfully.")
 